@@ -3,6 +3,7 @@
 echo "Run database migrations"
 python manage.py makemigrations --noinput
 python manage.py migrate --noinput
+python manage.py createcachetable
 
 # Run collectstatic
 echo "Run collectstatic"
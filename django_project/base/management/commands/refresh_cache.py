@@ -1,24 +1,88 @@
 from datetime import datetime
 import logging
+import time
 import pytz
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
 
 from geocontext.models.cache import Cache
+from geocontext.models.response_cache import ResponseCache
+from geocontext.models.service import Service
 
 logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    """Management command to delete expired caches to be run as cron."""
+    """Management command to delete expired caches to be run as cron.
+    Rows are deleted in primary key ranges of batch-size rows with a pause between
+    batches, so each statement holds locks briefly and WAL is written in small
+    steps. Caches within the stale_while_revalidate window of their service are
+    kept.
+    """
 
     help = 'Delete expired caches'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Primary key range deleted per statement (default 10000)')
+        parser.add_argument(
+            '--sleep', type=float, default=0.1,
+            help='Seconds to pause between batches (default 0.1)')
+
     def handle(self, *args, **options):
-        num_caches = Cache.objects.all().count()
-        logger.info(f'Deleting  cache')
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size should be positive')
         current_time = datetime.utcnow().replace(tzinfo=pytz.UTC)
-        Cache.objects.filter(expired_time__lte=current_time).delete()
-        logger.info(f'{num_caches} cache deleted')
-        num_caches = Cache.objects.all().count()
-        logger.info('Current number of caches: {num_caches}')
+        logger.info('Deleting expired cache')
+        query = f"""
+            DELETE FROM {Cache._meta.db_table} c
+            USING {Service._meta.db_table} s
+            WHERE c.service_id = s.id AND c.id >= %s AND c.id < %s
+            AND c.expired_time <= %s - make_interval(
+                secs => COALESCE(s.stale_while_revalidate, 0))
+        """
+        deleted = self.purge(Cache, query, [current_time], options)
+        logger.info(f'{deleted} cache deleted')
+
+        query = f"""
+            DELETE FROM {ResponseCache._meta.db_table}
+            WHERE id >= %s AND id < %s AND expired_time <= %s
+        """
+        deleted = self.purge(ResponseCache, query, [current_time], options)
+        logger.info(f'{deleted} stored responses deleted')
+
+    def purge(self, model, query: str, params: list, options: dict) -> int:
+        """Run delete query per primary key range of the model table.
+
+        :param model: Model of the table
+        :type model: Model
+        :param query: Delete query with id range and params placeholders
+        :type query: str
+        :param params: Query params after the id range
+        :type params: list
+        :param options: Command options
+        :type options: dict
+        :return: Number of deleted rows
+        :rtype: int
+        """
+        batch_size = options['batch_size']
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT min(id), max(id) FROM {model._meta.db_table}')
+            min_id, max_id = cursor.fetchone()
+        if min_id is None:
+            return 0
+
+        deleted = 0
+        for start in range(min_id, max_id + 1, batch_size):
+            with connection.cursor() as cursor:
+                cursor.execute(query, [start, start + batch_size] + params)
+                deleted += cursor.rowcount
+            logger.info(
+                f'{model.__name__}: {deleted} deleted, '
+                f'{min(start + batch_size, max_id + 1) - min_id} of '
+                f'{max_id + 1 - min_id} ids checked')
+            if options['sleep'] > 0 and start + batch_size <= max_id:
+                time.sleep(options['sleep'])
+        return deleted
@@ -15,15 +15,19 @@ class Command(BaseCommand):
     help = 'Test status of all services'
 
     def handle(self, *args, **options):
-        services = Service.objects.all()
+        services = Service.objects.filter(test_x__isnull=False, test_y__isnull=False)
+        async_services = []
         for service in services:
-            point = parse_coord(x=service.x, y=service.y, srid=service.srid)
-            async_service = AsyncService(service.key, point, service.tolerance)
-            new_async_service = async_retrieve_services([async_service])
-            if new_async_service[0].value != service.test_value:
+            point = parse_coord(x=str(service.test_x), y=str(service.test_y), srid=4326)
+            async_services.append(AsyncService(service, point, service.tolerance))
+
+        # All services are tested concurrently through the shared session
+        for new_async_service in async_retrieve_services(async_services):
+            service = new_async_service.service
+            if str(new_async_service.value) != str(service.test_value):
                 service.status = False
                 logger.warning(f'Service: {service.name} status offline')
             else:
                 service.status = True
                 logger.info(f'Service: {service.name} status online')
-            service.save()
+            service.save(update_fields=['status'])
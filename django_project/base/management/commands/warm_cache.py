@@ -0,0 +1,169 @@
+import hashlib
+from itertools import islice
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.core.management.base import BaseCommand, CommandError
+
+from geocontext.utilities.async_service import get_tolerance
+from geocontext.utilities.geometry import grid_points
+from geocontext.utilities.registry import get_registry
+from geocontext.utilities.worker import BatchWorker
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Management command to pre-populate caches for an area of interest.
+    Sample points are the centers of the tolerance grid cells inside the area.
+    Points with valid caches for all services are skipped, so an interrupted run
+    can be repeated - with a checkpoint file it resumes at the last finished batch.
+    """
+
+    help = 'Warm caches of a service, group or collection over an area'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'registry', choices=['service', 'group', 'collection'],
+            help='Registry of the key')
+        parser.add_argument('key', help='Service, group or collection key')
+        area = parser.add_mutually_exclusive_group(required=True)
+        area.add_argument('--bbox', help='Area as min_x,min_y,max_x,max_y')
+        area.add_argument('--wkt', help='Area as WKT')
+        area.add_argument('--geojson', help='Path to GeoJSON file with the area')
+        parser.add_argument(
+            '--srid', type=int, default=4326,
+            help='SRID of bbox or WKT (default 4326)')
+        parser.add_argument(
+            '--tolerance', type=float, default=10.0,
+            help='Query tolerance in meters (default service tolerance)')
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Points per cache lookup and checkpoint (default 100)')
+        parser.add_argument(
+            '--concurrency', type=int, default=10,
+            help='Maximum upstream requests in flight (default 10)')
+        parser.add_argument(
+            '--host-rate', type=float, default=5.0,
+            help='Maximum upstream requests per second per host (default 5)')
+        parser.add_argument(
+            '--checkpoint', help='Progress file to resume an interrupted run')
+
+    def handle(self, *args, **options):
+        registry = options['registry']
+        key = options['key']
+        tolerance = options['tolerance']
+        batch_size = options['batch_size']
+        if not 1 <= batch_size <= settings.BATCH_QUERY_MAX_POINTS:
+            raise CommandError(
+                f'Batch size should be between 1 and {settings.BATCH_QUERY_MAX_POINTS}')
+
+        area = self.parse_area(options)
+        services = list(get_registry().get_services(registry, key))
+        if len(services) == 0:
+            raise CommandError(f'{registry.capitalize()} "{key}" has no services')
+        grid_tolerance = min(get_tolerance(service, tolerance) for service in services)
+
+        progress = {
+            'registry': registry,
+            'key': key,
+            'area': hashlib.md5(bytes(area.ewkb)).hexdigest(),
+            'tolerance': grid_tolerance,
+            'points': 0,
+            'requests': 0,
+        }
+        checkpoint = options['checkpoint']
+        progress = self.load_checkpoint(checkpoint, progress)
+        if progress['points'] > 0:
+            logger.info(f'Resuming after {progress["points"]} points')
+
+        points = islice(grid_points(area, grid_tolerance), progress['points'], None)
+        while True:
+            batch = list(islice(points, batch_size))
+            if len(batch) == 0:
+                break
+            worker = BatchWorker(registry, key, batch, tolerance, 'json', log=False)
+            requests = worker.retrieve_missing(
+                services, worker.retrieve_caches(services),
+                options['concurrency'], options['host_rate'])
+
+            progress['points'] += len(batch)
+            progress['requests'] += requests
+            self.save_checkpoint(checkpoint, progress)
+            logger.info(
+                f'{progress["points"]} points warmed, '
+                f'{progress["requests"]} values requested')
+        logger.info(f'Cache warmed for {registry} "{key}"')
+
+    def parse_area(self, options: dict) -> GEOSGeometry:
+        """Parse area of interest from bbox, WKT or GeoJSON file options.
+
+        :param options: Command options
+        :type options: dict
+        :return: Area geometry
+        :rtype: GEOSGeometry
+        """
+        try:
+            if options['bbox']:
+                bbox = [float(value) for value in options['bbox'].split(',')]
+                if len(bbox) != 4:
+                    raise ValueError('bbox should be min_x,min_y,max_x,max_y')
+                area = Polygon.from_bbox(bbox)
+                area.srid = options['srid']
+            elif options['wkt']:
+                area = GEOSGeometry(options['wkt'], srid=options['srid'])
+            else:
+                with open(options['geojson']) as f:
+                    data = json.load(f)
+                if data.get('type') == 'FeatureCollection':
+                    geometries = [feature['geometry'] for feature in data['features']]
+                elif data.get('type') == 'Feature':
+                    geometries = [data['geometry']]
+                else:
+                    geometries = [data]
+                area = None
+                for geometry in geometries:
+                    geometry = GEOSGeometry(json.dumps(geometry), srid=4326)
+                    area = geometry if area is None else area.union(geometry)
+        except (ValueError, KeyError, OSError) as e:
+            raise CommandError(f'Invalid area: {e}')
+        if area is None or area.empty or area.dims < 2:
+            raise CommandError('Area should be a non empty polygon')
+        return area
+
+    def load_checkpoint(self, path: str, progress: dict) -> dict:
+        """Load progress from checkpoint file if it was written for the same run.
+
+        :param path: Checkpoint file path (None for no checkpoint)
+        :type path: str
+        :param progress: Initial progress
+        :type progress: dict
+        :return: Progress to start from
+        :rtype: dict
+        """
+        if path is None or not os.path.exists(path):
+            return progress
+        with open(path) as f:
+            saved = json.load(f)
+        fields = ['registry', 'key', 'area', 'tolerance']
+        if any(saved.get(field) != progress[field] for field in fields):
+            logger.warning(f'Checkpoint {path} is for another run - starting over')
+            return progress
+        return saved
+
+    def save_checkpoint(self, path: str, progress: dict):
+        """Write progress atomically to checkpoint file.
+
+        :param path: Checkpoint file path (None for no checkpoint)
+        :type path: str
+        :param progress: Progress
+        :type progress: dict
+        """
+        if path is None:
+            return
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(progress, f)
+        os.replace(f'{path}.tmp', path)
@@ -152,5 +152,17 @@ RIVER_DATABASE = {
     'USER': os.environ.get('RIVER_DATABASE_USER'),
     'PASSWORD': os.environ.get('RIVER_DATABASE_PASSWORD'),
     'HOST': os.environ.get('RIVER_DATABASE_HOST'),
-    'PORT': 5432,
+    'PORT': int(os.environ.get('RIVER_DATABASE_PORT', 5432)),
 }
+
+# Bounded connection pool for the river database (per worker process).
+RIVER_DATABASE_POOL_MAX = int(os.environ.get('RIVER_DATABASE_POOL_MAX', 5))
+RIVER_DATABASE_POOL_TIMEOUT = float(
+    os.environ.get('RIVER_DATABASE_POOL_TIMEOUT', 2)
+)
+RIVER_DATABASE_POOL_CHECK_INTERVAL = float(
+    os.environ.get('RIVER_DATABASE_POOL_CHECK_INTERVAL', 30)
+)
+RIVER_DATABASE_CONNECT_TIMEOUT = int(
+    os.environ.get('RIVER_DATABASE_CONNECT_TIMEOUT', 5)
+)
@@ -30,3 +30,152 @@ VALID_DOMAIN = [
 ENABLE_API_TOKEN = ast.literal_eval(
     os.environ.get('ENABLE_API_TOKEN', 'False')
 )
+
+# Maximum number of points accepted by a single batch query (API v2).
+BATCH_QUERY_MAX_POINTS = int(
+    os.environ.get('BATCH_QUERY_MAX_POINTS', 1000)
+)
+# Maximum number of upstream requests in flight for the cache misses of a batch query.
+BATCH_QUERY_CONCURRENCY = int(
+    os.environ.get('BATCH_QUERY_CONCURRENCY', 20)
+)
+
+# Seconds after which uWSGI kills a request (harakiri in deployment/docker/uwsgi.conf).
+REQUEST_TIME_LIMIT = float(os.environ.get('REQUEST_TIME_LIMIT', 30))
+
+# Shared upstream http session (per worker process) - timeouts in seconds.
+UPSTREAM_HTTP_TIMEOUT = float(os.environ.get('UPSTREAM_HTTP_TIMEOUT', 20))
+UPSTREAM_HTTP_CONNECT_TIMEOUT = float(
+    os.environ.get('UPSTREAM_HTTP_CONNECT_TIMEOUT', 2)
+)
+UPSTREAM_HTTP_LIMIT = int(os.environ.get('UPSTREAM_HTTP_LIMIT', 100))
+UPSTREAM_HTTP_LIMIT_PER_HOST = int(
+    os.environ.get('UPSTREAM_HTTP_LIMIT_PER_HOST', 10)
+)
+UPSTREAM_HTTP_KEEPALIVE = float(os.environ.get('UPSTREAM_HTTP_KEEPALIVE', 30))
+UPSTREAM_HTTP_DNS_TTL = int(os.environ.get('UPSTREAM_HTTP_DNS_TTL', 300))
+
+# Geometries with more coordinates than this are parsed in a process pool.
+GEOMETRY_POOL_WORKERS = int(os.environ.get('GEOMETRY_POOL_WORKERS', 2))
+GEOMETRY_POOL_MIN_COORDINATES = int(
+    os.environ.get('GEOMETRY_POOL_MIN_COORDINATES', 5000)
+)
+
+# The 'shared' cache is shared by all worker processes - it holds the registry
+# version and circuit breaker state (the database table is created with
+# createcachetable). The per process 'default' cache keeps throttle history.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.environ.get(
+            'SHARED_CACHE_BACKEND', 'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get('SHARED_CACHE_LOCATION', 'geocontext_shared_cache'),
+    },
+}
+
+# Maximum age in seconds of the in-process registry snapshot. Registry edits
+# invalidate it in all processes through a version counter in the shared cache
+# backend, bumped when the edit is committed.
+REGISTRY_SNAPSHOT_TTL = int(os.environ.get('REGISTRY_SNAPSHOT_TTL', 300))
+# Seconds between reads of the shared registry version, so edits made in other
+# processes are picked up within this interval without a read per lookup.
+REGISTRY_VERSION_POLL_INTERVAL = float(
+    os.environ.get('REGISTRY_VERSION_POLL_INTERVAL', 1)
+)
+
+# Query logging: 'sync' saves a Log per query, 'batched' buffers logs and bulk
+# creates them from a background thread per QUERY_LOG_BATCH_SIZE logs or every
+# QUERY_LOG_FLUSH_INTERVAL seconds, 'sampled' batches only a QUERY_LOG_SAMPLE_RATE
+# fraction and 'off' disables it.
+QUERY_LOG_MODE = os.environ.get('QUERY_LOG_MODE', 'batched')
+QUERY_LOG_BATCH_SIZE = int(os.environ.get('QUERY_LOG_BATCH_SIZE', 500))
+QUERY_LOG_FLUSH_INTERVAL = float(os.environ.get('QUERY_LOG_FLUSH_INTERVAL', 30))
+QUERY_LOG_SAMPLE_RATE = float(os.environ.get('QUERY_LOG_SAMPLE_RATE', 0.1))
+
+# Per process cache of API tokens and user tier rates (seconds / entries).
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 60))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 10000))
+
+# Single flight: concurrent cache misses for the same service and grid cell wait
+# for one upstream request (in-process and PostgreSQL advisory locks). A follower
+# that times out fetches itself, so the wait plus its own upstream request leave
+# SINGLE_FLIGHT_MARGIN seconds for the rest of the request within REQUEST_TIME_LIMIT.
+SINGLE_FLIGHT_ENABLED = ast.literal_eval(
+    os.environ.get('SINGLE_FLIGHT_ENABLED', 'True')
+)
+SINGLE_FLIGHT_MARGIN = float(os.environ.get('SINGLE_FLIGHT_MARGIN', 5))
+SINGLE_FLIGHT_TIMEOUT = max(min(
+    float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', REQUEST_TIME_LIMIT)),
+    REQUEST_TIME_LIMIT - UPSTREAM_HTTP_TIMEOUT - SINGLE_FLIGHT_MARGIN
+), 0)
+SINGLE_FLIGHT_POLL_INTERVAL = float(
+    os.environ.get('SINGLE_FLIGHT_POLL_INTERVAL', 0.05)
+)
+
+# Look up caches by hashed service tolerance grid cell (in process, then by an
+# indexed key) before running the spatial cache query.
+CACHE_CELL_KEYS = ast.literal_eval(os.environ.get('CACHE_CELL_KEYS', 'False'))
+CACHE_CELL_KEYS_LOCAL_ENTRIES = int(
+    os.environ.get('CACHE_CELL_KEYS_LOCAL_ENTRIES', 10000)
+)
+
+# Containment caching (Service.cache_containment): cached polygons are clipped to
+# a square of CACHE_CONTAINMENT_CLIP meters around the query point and simplified
+# with CACHE_CONTAINMENT_SIMPLIFY meters.
+CACHE_CONTAINMENT_CLIP = float(os.environ.get('CACHE_CONTAINMENT_CLIP', 5000))
+CACHE_CONTAINMENT_SIMPLIFY = float(
+    os.environ.get('CACHE_CONTAINMENT_SIMPLIFY', 1)
+)
+
+# Per process cache of nested query results per registry key and tolerance grid
+# cell, in front of the Cache table (entries / total bytes of serialized results).
+# Results are keyed by the shared registry version, so registry edits invalidate
+# them in all processes.
+RESULT_CACHE_LOCAL = ast.literal_eval(os.environ.get('RESULT_CACHE_LOCAL', 'True'))
+RESULT_CACHE_LOCAL_ENTRIES = int(os.environ.get('RESULT_CACHE_LOCAL_ENTRIES', 10000))
+RESULT_CACHE_LOCAL_BYTES = int(
+    os.environ.get('RESULT_CACHE_LOCAL_BYTES', 64 * 1024 * 1024)
+)
+
+# Store rendered query responses per registry key and tolerance grid cell and
+# return them as-is from /api/v2/query.
+RESPONSE_CACHE = ast.literal_eval(os.environ.get('RESPONSE_CACHE', 'False'))
+
+# Threads per process refreshing caches returned within a service
+# stale_while_revalidate window.
+STALE_REFRESH_WORKERS = int(os.environ.get('STALE_REFRESH_WORKERS', 4))
+
+# Seconds failed upstream requests (no value) are cached - 0 to not cache them.
+CACHE_NEGATIVE_TTL = int(os.environ.get('CACHE_NEGATIVE_TTL', 300))
+
+# Circuit breaker per service, shared through the cache backend: after
+# CIRCUIT_BREAKER_THRESHOLD failed requests within CIRCUIT_BREAKER_WINDOW seconds
+# requests fail fast for CIRCUIT_BREAKER_COOLDOWN seconds before a trial request.
+CIRCUIT_BREAKER_ENABLED = ast.literal_eval(
+    os.environ.get('CIRCUIT_BREAKER_ENABLED', 'True')
+)
+CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_THRESHOLD', 5))
+CIRCUIT_BREAKER_WINDOW = int(os.environ.get('CIRCUIT_BREAKER_WINDOW', 60))
+CIRCUIT_BREAKER_COOLDOWN = int(os.environ.get('CIRCUIT_BREAKER_COOLDOWN', 30))
+
+# Per process cache of layer bounding boxes parsed from capabilities documents
+# (entries are service url and version, ttl in seconds).
+CAPABILITIES_CACHE_ENTRIES = int(os.environ.get('CAPABILITIES_CACHE_ENTRIES', 100))
+CAPABILITIES_CACHE_TTL = float(os.environ.get('CAPABILITIES_CACHE_TTL', 3600))
+
+# Upstream responses larger than this are discarded (bytes). Responses larger than
+# UPSTREAM_DECODE_THREAD_BYTES are decoded outside the event loop.
+UPSTREAM_MAX_RESPONSE_BYTES = int(
+    os.environ.get('UPSTREAM_MAX_RESPONSE_BYTES', 8 * 1024 * 1024)
+)
+UPSTREAM_DECODE_THREAD_BYTES = int(
+    os.environ.get('UPSTREAM_DECODE_THREAD_BYTES', 256 * 1024)
+)
+
+# Merge WMS services on the same server, version, srid and point into a single
+# multi-layer GetFeatureInfo. Features are assigned back to services by their
+# "layer.fid" feature id (GeoServer) - responses with other ids are requested again
+# per layer, so only enable this for servers returning such ids.
+WMS_BATCH_LAYERS = ast.literal_eval(os.environ.get('WMS_BATCH_LAYERS', 'False'))
@@ -7,6 +7,17 @@ INSTALLED_APPS += (
 
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
+# Tests count database queries - shared cache backend tests override this
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+}
+
 NOSE_ARGS = (
     '--with-coverage',
     '--cover-erase',
@@ -18,6 +29,11 @@ NOSE_ARGS = (
     '--nologcapture'
 )
 
+# Save query logs directly so query counts in tests are deterministic
+QUERY_LOG_MODE = 'sync'
+# Query the Cache table on every request so tests see database behaviour
+RESULT_CACHE_LOCAL = False
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # change this to a proper location
 EMAIL_FILE_PATH = '/tmp/'
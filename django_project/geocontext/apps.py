@@ -1,5 +1,48 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class GeocontextConfig(AppConfig):
     name = 'geocontext'
+
+    def ready(self):
+        """Connect signals that invalidate registry, result and token caches."""
+        from django.contrib.auth import get_user_model
+        from rest_framework.authtoken.models import Token
+
+        from geocontext.authentication import TOKEN_CACHE
+        from geocontext.models import (
+            Collection, CollectionGroups, Group, GroupServices, Service,
+            UserProfile, UserTier
+        )
+        from geocontext.utilities.registry import invalidate_registry
+        from geocontext.utilities.worker import clear_results
+
+        for model in [Service, Group, GroupServices, Collection, CollectionGroups]:
+            post_save.connect(
+                invalidate_registry, sender=model,
+                dispatch_uid=f'invalidate_registry_save_{model.__name__}')
+            post_delete.connect(
+                invalidate_registry, sender=model,
+                dispatch_uid=f'invalidate_registry_delete_{model.__name__}')
+            post_save.connect(
+                clear_results, sender=model,
+                dispatch_uid=f'clear_results_save_{model.__name__}')
+            post_delete.connect(
+                clear_results, sender=model,
+                dispatch_uid=f'clear_results_delete_{model.__name__}')
+        for through in [Group.services.through, Collection.groups.through]:
+            m2m_changed.connect(
+                invalidate_registry, sender=through,
+                dispatch_uid=f'invalidate_registry_m2m_{through.__name__}')
+            m2m_changed.connect(
+                clear_results, sender=through,
+                dispatch_uid=f'clear_results_m2m_{through.__name__}')
+
+        for model in [get_user_model(), Token, UserProfile, UserTier]:
+            post_save.connect(
+                TOKEN_CACHE.clear, sender=model,
+                dispatch_uid=f'clear_token_cache_save_{model.__name__}')
+            post_delete.connect(
+                TOKEN_CACHE.clear, sender=model,
+                dispatch_uid=f'clear_token_cache_delete_{model.__name__}')
@@ -4,6 +4,13 @@ from django.conf import settings
 from rest_framework.authentication import TokenAuthentication
 from rest_framework import exceptions
 
+from geocontext.utilities.lru import LRUCache
+
+# Per process token -> (user, token) and token -> tier rate cache. Cleared when a
+# user, token, profile or tier is saved or deleted.
+TOKEN_CACHE = LRUCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES, ttl=settings.TOKEN_CACHE_TTL)
+
 
 class CustomTokenAuthentication(TokenAuthentication):
     """
@@ -25,3 +32,11 @@ class CustomTokenAuthentication(TokenAuthentication):
             raise exceptions.AuthenticationFailed(msg)
 
         return self.authenticate_credentials(token)
+
+    def authenticate_credentials(self, key):
+        """Return cached (user, token) - only valid credentials are cached."""
+        credentials = TOKEN_CACHE.get(('user', key))
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            TOKEN_CACHE.set(('user', key), credentials)
+        return credentials
@@ -0,0 +1,18 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Concurrent index creation can not run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('geocontext', '0004_auto_20220728_1026'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='cache',
+            index=models.Index(fields=['service', 'expired_time'], name='cache_service_expired_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Concurrent index creation can not run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('geocontext', '0005_cache_service_expired_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cache',
+            name='cell_key',
+            field=models.CharField(blank=True, help_text='Hashed service tolerance grid cell of the query point.', max_length=32, null=True),
+        ),
+        AddIndexConcurrently(
+            model_name='cache',
+            index=models.Index(fields=['cell_key'], name='cache_cell_key_idx'),
+        ),
+    ]
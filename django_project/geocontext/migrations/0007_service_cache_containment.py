@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocontext', '0006_cache_cell_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='cache_containment',
+            field=models.BooleanField(default=False, help_text='Area-valued service: cache hits for any query point inside a cached polygon instead of within tolerance of it.'),
+        ),
+    ]
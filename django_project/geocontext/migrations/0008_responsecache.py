@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocontext', '0007_service_cache_containment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseCache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registry', models.CharField(help_text='Registry that was queried.', max_length=200)),
+                ('key', models.CharField(help_text='Query key.', max_length=200)),
+                ('cell_key', models.CharField(help_text='Hashed registry key and tolerance grid cell of the query point.', max_length=32)),
+                ('body', models.TextField(help_text='Rendered JSON response.')),
+                ('created_time', models.DateTimeField(editable=False, help_text='Date of response entry.')),
+                ('expired_time', models.DateTimeField(help_text='Date when the response expires.')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='responsecache',
+            index=models.Index(fields=['cell_key', 'expired_time'], name='response_cell_expired_idx'),
+        ),
+    ]
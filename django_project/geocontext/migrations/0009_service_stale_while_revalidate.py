@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocontext', '0008_responsecache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='stale_while_revalidate',
+            field=models.IntegerField(blank=True, help_text='Seconds after expiry during which a cache is still returned (flagged as stale) while it is refreshed in the background. Empty to disable.', null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocontext', '0009_service_stale_while_revalidate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cache',
+            name='geometry_hash',
+            field=models.CharField(blank=True, help_text='Hash of the geometry - unique per service.', max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('geocontext', '0010_cache_geometry_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='return_geometry',
+            field=models.BooleanField(default=True, help_text='Request feature geometries. Without geometries the first feature value is used and cached for the query point.'),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='geometry_precision',
+            field=models.IntegerField(blank=True, help_text='Decimal places of returned coordinates (ArcREST).', null=True),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='geometry_simplify',
+            field=models.FloatField(blank=True, help_text='Maximum offset in meters when simplifying returned geometries (ArcREST).', null=True),
+        ),
+    ]
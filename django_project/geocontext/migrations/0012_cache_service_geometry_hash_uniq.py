@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Concurrent index creation can not run inside a transaction. Existing caches
+    # keep a NULL geometry hash - they never conflict and expire as usual.
+    atomic = False
+
+    dependencies = [
+        ('geocontext', '0011_service_geometry_options'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql='CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS '
+                        'cache_service_geometry_hash_uniq '
+                        'ON geocontext_cache (service_id, geometry_hash)',
+                    reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS '
+                                'cache_service_geometry_hash_uniq',
+                ),
+                migrations.RunSQL(
+                    sql='ALTER TABLE geocontext_cache '
+                        'ADD CONSTRAINT cache_service_geometry_hash_uniq '
+                        'UNIQUE USING INDEX cache_service_geometry_hash_uniq',
+                    reverse_sql='ALTER TABLE geocontext_cache '
+                                'DROP CONSTRAINT cache_service_geometry_hash_uniq',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='cache',
+                    constraint=models.UniqueConstraint(fields=('service', 'geometry_hash'), name='cache_service_geometry_hash_uniq'),
+                ),
+            ],
+        ),
+    ]
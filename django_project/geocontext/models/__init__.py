@@ -1,4 +1,5 @@
 from geocontext.models.cache import *
+from geocontext.models.response_cache import *
 from geocontext.models.service import *
 from geocontext.models.group_services import *
 from geocontext.models.collection_groups import *
@@ -46,3 +46,28 @@ class Cache(models.Model):
         blank=False,
         null=False
     )
+    cell_key = models.CharField(
+        help_text=_('Hashed service tolerance grid cell of the query point.'),
+        blank=True,
+        null=True,
+        max_length=32,
+    )
+
+    geometry_hash = models.CharField(
+        help_text=_('Hash of the geometry - unique per service.'),
+        blank=True,
+        null=True,
+        max_length=32,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['service', 'geometry_hash'],
+                name='cache_service_geometry_hash_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['service', 'expired_time'], name='cache_service_expired_idx'),
+            models.Index(fields=['cell_key'], name='cache_cell_key_idx'),
+        ]
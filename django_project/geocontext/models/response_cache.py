@@ -0,0 +1,44 @@
+from django.utils.translation import ugettext_lazy as _
+from django.contrib.gis.db import models
+
+
+class ResponseCache(models.Model):
+    """Rendered query response for a registry key and tolerance grid cell."""
+    registry = models.CharField(
+        help_text=_('Registry that was queried.'),
+        blank=False,
+        null=False,
+        max_length=200,
+    )
+    key = models.CharField(
+        help_text=_('Query key.'),
+        blank=False,
+        null=False,
+        max_length=200,
+    )
+    cell_key = models.CharField(
+        help_text=_('Hashed registry key and tolerance grid cell of the query point.'),
+        blank=False,
+        null=False,
+        max_length=32,
+    )
+    body = models.TextField(
+        help_text=_('Rendered JSON response.'),
+        blank=False,
+        null=False,
+    )
+    created_time = models.DateTimeField(
+        help_text=_('Date of response entry.'),
+        editable=False
+    )
+    expired_time = models.DateTimeField(
+        help_text=_('Date when the response expires.'),
+        blank=False,
+        null=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['cell_key', 'expired_time'], name='response_cell_expired_idx'),
+        ]
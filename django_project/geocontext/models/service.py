@@ -187,6 +187,38 @@ class Service(models.Model):
         max_length=1000,
     )
 
+    return_geometry = models.BooleanField(
+        help_text=_(
+            'Request feature geometries. Without geometries the first feature value '
+            'is used and cached for the query point.'),
+        default=True,
+    )
+    geometry_precision = models.IntegerField(
+        help_text=_('Decimal places of returned coordinates (ArcREST).'),
+        blank=True,
+        null=True,
+    )
+    geometry_simplify = models.FloatField(
+        help_text=_(
+            'Maximum offset in meters when simplifying returned geometries (ArcREST).'),
+        blank=True,
+        null=True,
+    )
+
+    stale_while_revalidate = models.IntegerField(
+        help_text=_(
+            'Seconds after expiry during which a cache is still returned (flagged as '
+            'stale) while it is refreshed in the background. Empty to disable.'),
+        blank=True,
+        null=True,
+    )
+    cache_containment = models.BooleanField(
+        help_text=_(
+            'Area-valued service: cache hits for any query point inside a cached '
+            'polygon instead of within tolerance of it.'),
+        default=False,
+    )
+
     permission_groups = models.ManyToManyField(
         AuthGroup,
         help_text=_('List of auth groups with access to this service.'),
@@ -24,6 +24,13 @@ class CacheSerializer(serializers.ModelSerializer):
             'query_type',
         )
 
+    def to_representation(self, instance):
+        """Flag caches returned after expiry while they are refreshed."""
+        data = super().to_representation(instance)
+        if getattr(instance, 'stale', False):
+            data['stale'] = True
+        return data
+
 
 class CacheGeoJSONSerializer(CacheSerializer, GeoFeatureModelSerializer):
     """GeoJSON serializer for cache."""
@@ -27,4 +27,9 @@ class ServiceSerializer(serializers.ModelSerializer):
             'test_y',
             'test_value',
             'status',
+            'cache_containment',
+            'stale_while_revalidate',
+            'return_geometry',
+            'geometry_precision',
+            'geometry_simplify',
         )
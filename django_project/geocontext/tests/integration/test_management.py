@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+import json
+import pytest
+import pytz
+
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from base.management.commands.warm_cache import Command
+from geocontext.models.cache import Cache
+from geocontext.models.response_cache import ResponseCache
+from geocontext.tests.unit.model_factories import ServiceF
+from geocontext.utilities.geometry import transform
+
+AREA = ['--bbox', '0,0,200,200', '--srid', '3857', '--tolerance', '100']
+
+
+@pytest.fixture
+def requested(monkeypatch):
+    """Replace upstream requests by values at the query point, recording points."""
+    points = []
+
+    def async_retrieve_services(async_services, concurrency=None, host_rate=None):
+        for util in async_services:
+            points.append(util.point_cache.coords)
+            util.value = 'warm'
+        return async_services
+
+    monkeypatch.setattr(
+        'geocontext.utilities.worker.async_retrieve_services', async_retrieve_services)
+    return points
+
+
+@pytest.mark.django_db
+def test_warm_cache_skips_cached_points(requested):
+    service = ServiceF.create(tolerance=None)
+    call_command('warm_cache', 'service', service.key, *AREA)
+    assert len(requested) > 1
+    assert Cache.objects.count() == len(requested)
+
+    warmed = len(requested)
+    call_command('warm_cache', 'service', service.key, *AREA)
+    assert len(requested) == warmed
+
+
+@pytest.mark.django_db
+def test_warm_cache_resume(requested, monkeypatch, tmp_path):
+    service = ServiceF.create(tolerance=None)
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    call_command('warm_cache', 'service', service.key, *AREA)
+    points = list(requested)
+    Cache.objects.all().delete()
+    requested.clear()
+
+    # Interrupted after the first batch of two points
+    save_checkpoint = Command.save_checkpoint
+
+    def interrupt(command, path, progress):
+        save_checkpoint(command, path, progress)
+        raise KeyboardInterrupt()
+
+    monkeypatch.setattr(Command, 'save_checkpoint', interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        call_command(
+            'warm_cache', 'service', service.key, *AREA, '--batch-size', '2',
+            '--checkpoint', checkpoint)
+    assert requested == points[:2]
+    monkeypatch.setattr(Command, 'save_checkpoint', save_checkpoint)
+
+    call_command(
+        'warm_cache', 'service', service.key, *AREA, '--batch-size', '2',
+        '--checkpoint', checkpoint)
+    assert requested == points
+    with open(checkpoint) as f:
+        assert json.load(f)['points'] == len(points)
+
+
+@pytest.mark.django_db
+def test_refresh_cache():
+    service = ServiceF.create(stale_while_revalidate=None)
+    stale_service = ServiceF.create(stale_while_revalidate=3600)
+    point = transform(Point(18.4, -33.9, srid=4326), Cache.srid)
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    caches = {
+        'expired': (service, now - timedelta(minutes=10)),
+        'valid': (service, now + timedelta(hours=1)),
+        'stale': (stale_service, now - timedelta(minutes=10)),
+        'expired stale': (stale_service, now - timedelta(hours=2)),
+    }
+    for value, (cache_service, expired_time) in caches.items():
+        Cache.objects.create(
+            service=cache_service, name=cache_service.key, value=value,
+            geometry=point, created_time=now, expired_time=expired_time)
+    for key, expired_time in [
+            ('expired', now - timedelta(minutes=10)),
+            ('valid', now + timedelta(hours=1))]:
+        ResponseCache.objects.create(
+            registry='service', key=key, cell_key=key, body='{}',
+            created_time=now, expired_time=expired_time)
+
+    with CaptureQueriesContext(connection) as context:
+        call_command('refresh_cache', '--batch-size', '3', '--sleep', '0')
+    # Four caches in two id ranges and two stored responses in one
+    deletes = [query for query in context if 'DELETE' in query['sql']]
+    assert len(deletes) == 3
+    assert sorted(Cache.objects.values_list('value', flat=True)) == ['stale', 'valid']
+    assert list(ResponseCache.objects.values_list('key', flat=True)) == ['valid']
@@ -1,9 +1,12 @@
+import json
+
 from django.test import TestCase, override_settings
 
 from rest_framework.test import APIRequestFactory
 
 from .unit.model_factories import *
-from geocontext.views.api_v2 import GenericAPIView
+from geocontext.models.response_cache import ResponseCache
+from geocontext.views.api_v2 import BatchAPIView, GenericAPIView
 
 
 class TestAPI(TestCase):
@@ -11,6 +14,7 @@ class TestAPI(TestCase):
     def setUp(self):
         service = ServiceF.create()
         group = GroupF.create()
+        self.group = group
         GroupServicesF.create(
             service=service,
             group=group
@@ -83,3 +87,112 @@ class TestAPI(TestCase):
 
         self.assertEqual(response.status_code, 429) # throttled
 
+
+    @override_settings(ENABLE_API_TOKEN=False)
+    def test_batch_query(self):
+        view = BatchAPIView.as_view()
+        api_factory = APIRequestFactory()
+
+        request = api_factory.post('/api/v2/query/batch', {
+            'registry': 'group',
+            'key': self.group.key,
+            'outformat': 'json',
+            'points': [
+                [22.910152673721317, -32.53952445888535],
+                {'x': 22.9, 'y': -32.5}
+            ]
+        }, format='json')
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]['key'], self.group.key)
+
+    @override_settings(ENABLE_API_TOKEN=False)
+    def test_batch_query_feature_collection(self):
+        view = BatchAPIView.as_view()
+        api_factory = APIRequestFactory()
+
+        request = api_factory.post(
+            '/api/v2/query/batch?registry=group&key={}'.format(self.group.key), {
+                'type': 'FeatureCollection',
+                'features': [{
+                    'type': 'Feature',
+                    'properties': {},
+                    'geometry': {
+                        'type': 'Point',
+                        'coordinates': [22.910152673721317, -32.53952445888535]
+                    }
+                }]
+            }, format='json')
+        response = view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['type'], 'FeatureCollection')
+        self.assertEqual(len(response.data['features']), 1)
+
+    @override_settings(ENABLE_API_TOKEN=False)
+    def test_batch_query_missing_points(self):
+        view = BatchAPIView.as_view()
+        api_factory = APIRequestFactory()
+
+        request = api_factory.post('/api/v2/query/batch', {
+            'registry': 'group',
+            'key': self.group.key,
+        }, format='json')
+        response = view(request)
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(ENABLE_API_TOKEN=False, BATCH_QUERY_MAX_POINTS=1)
+    def test_batch_query_too_many_points(self):
+        view = BatchAPIView.as_view()
+        api_factory = APIRequestFactory()
+
+        request = api_factory.post('/api/v2/query/batch', {
+            'registry': 'group',
+            'key': self.group.key,
+            'points': [[22.9, -32.5], [22.8, -32.4]]
+        }, format='json')
+        response = view(request)
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(ENABLE_API_TOKEN=True)
+    def test_batch_query_throttled_per_point(self):
+        view = BatchAPIView.as_view()
+        api_factory = APIRequestFactory()
+
+        user = UserF.create()
+        token = user.auth_token.key
+        user_tier = UserTierF.create(request_limit='3/day')
+        UserProfileF.create(user=user, user_tier=user_tier)
+
+        url = '/api/v2/query/batch?token=' + token
+        body = {
+            'registry': 'group',
+            'key': self.group.key,
+            'outformat': 'json',
+            'points': [[22.9, -32.5], [22.8, -32.4]]
+        }
+        response = view(api_factory.post(url, body, format='json'))
+        self.assertEqual(response.status_code, 200)
+
+        # Two points do not fit in the one request left
+        response = view(api_factory.post(url, body, format='json'))
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(ENABLE_API_TOKEN=False, RESPONSE_CACHE=True)
+    def test_response_cache(self):
+        view = GenericAPIView.as_view()
+        api_factory = APIRequestFactory()
+
+        response = view(api_factory.get(self.api_url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ResponseCache.objects.count(), 1)
+
+        response = view(api_factory.get(self.api_url))
+        feature = json.loads(response.content)
+        self.assertEqual(ResponseCache.objects.count(), 1)
+        self.assertEqual(feature['type'], 'Feature')
+        self.assertEqual(feature['properties']['key'], self.group.key)
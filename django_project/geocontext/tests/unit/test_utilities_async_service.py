@@ -0,0 +1,186 @@
+import asyncio
+
+import pytest
+
+from django.contrib.gis.geos import Point
+
+from geocontext.tests.unit.model_factories import ServiceF
+from geocontext.utilities.async_service import (
+    decode_features, decode_json, gather_services, get_geometry_executor,
+    prune_features, split_layers, AsyncService, ResponseTooLarge
+)
+from geocontext.utilities.geometry import parse_geometry
+
+
+def test_decode_json_control_characters():
+    assert decode_json(b'{"value": "line\nbreak"}') == {'value': 'line\nbreak'}
+
+
+def test_decode_features():
+    body = b'{"features": [{"properties": {"name": "Cape Town", "code": "CPT"}}]}'
+    assert decode_features(body, 'features', ['name']) == {
+        'features': [{'properties': {'name': 'Cape Town'}}]}
+
+
+def test_geometry_executor_forkserver():
+    executor = get_geometry_executor()
+    assert executor._mp_context.get_start_method() == 'forkserver'
+    geometry = {'type': 'Point', 'coordinates': [18.4, -33.9]}
+    assert executor.submit(parse_geometry, geometry).result(timeout=30).x == 18.4
+
+
+@pytest.mark.django_db
+def test_retrieve_values_response_too_large(monkeypatch):
+    async def fetch_features(self):
+        raise ResponseTooLarge('Response larger than 10 bytes')
+
+    monkeypatch.setattr(AsyncService, 'fetch_features', fetch_features)
+    point = Point(18.4, -33.9, srid=4326)
+    services = [
+        ServiceF.create(
+            query_type='WFS', url='https://example.com/wfs', srid=4326,
+            layer_typename='admin:provinces', layer_name=layer_name)
+        for layer_name in ['name', 'code']
+    ]
+    async_services = [AsyncService(service, point, 10.0) for service in services]
+    asyncio.run(gather_services(None, async_services))
+    assert all(util.failed and util.value is None for util in async_services)
+
+
+def test_prune_features():
+    features = [
+        {
+            'type': 'Feature',
+            'properties': {'name': 'Western Cape', 'area': 129462, 'code': 'WC'},
+            'geometry': {'type': 'Point', 'coordinates': [18.4, -33.9]}
+        },
+        {'name': 'Cape Town', 'lat': -33.9, 'lng': 18.4},
+    ]
+    assert prune_features(features, ['name']) == [
+        {
+            'properties': {'name': 'Western Cape'},
+            'geometry': {'type': 'Point', 'coordinates': [18.4, -33.9]}
+        },
+        {'name': 'Cape Town'},
+    ]
+
+
+@pytest.mark.django_db
+def test_gather_services_shared_request(monkeypatch):
+    calls = []
+
+    async def fetch_features(self):
+        calls.append(self.properties)
+        return [{
+            'properties': {'name': 'Western Cape', 'code': 'WC'},
+            'geometry': {'type': 'Point', 'coordinates': [18.4, -33.9]}
+        }]
+
+    monkeypatch.setattr(AsyncService, 'fetch_features', fetch_features)
+    point = Point(18.4, -33.9, srid=4326)
+    services = [
+        ServiceF.create(
+            query_type='WFS', url='https://example.com/wfs', srid=4326,
+            layer_typename='admin:provinces', layer_name=layer_name)
+        for layer_name in ['name', 'code']
+    ]
+    async_services = [AsyncService(service, point, 10.0) for service in services]
+    asyncio.run(gather_services(None, async_services))
+    assert calls == [['name', 'code']]
+    assert [util.value for util in async_services] == ['Western Cape', 'WC']
+
+
+@pytest.mark.django_db
+def test_retrieve_values_fallback_unsaved_members(monkeypatch):
+    fallbacks = []
+    save_features = AsyncService.save_features
+
+    async def fetch_features(self):
+        return [{'properties': {'name': 'Western Cape', 'code': 'WC'}}]
+
+    async def failing_save_features(self, features, geometries=None):
+        if self.layer_name == 'code':
+            raise ValueError('Invalid feature')
+        await save_features(self, features, geometries)
+
+    async def fetch_sql_view(self):
+        fallbacks.append(self.layer_name)
+
+    monkeypatch.setattr(AsyncService, 'fetch_features', fetch_features)
+    monkeypatch.setattr(AsyncService, 'save_features', failing_save_features)
+    monkeypatch.setattr(AsyncService, 'fetch_sql_view', fetch_sql_view)
+    point = Point(18.4, -33.9, srid=4326)
+    services = [
+        ServiceF.create(
+            query_type='WFS', url='https://example.com/wfs', srid=4326,
+            layer_typename='admin:provinces', layer_name=layer_name)
+        for layer_name in ['name', 'code']
+    ]
+    async_services = [AsyncService(service, point, 10.0) for service in services]
+    asyncio.run(gather_services(None, async_services))
+    assert fallbacks == ['code']
+    assert async_services[0].value == 'Western Cape'
+
+
+def test_split_layers():
+    features = [
+        {'id': 'provinces.1', 'properties': {'name': 'Western Cape'}},
+        {'id': 'admin:municipalities.7', 'properties': {'name': 'City of Cape Town'}},
+    ]
+    typenames = ['admin:provinces', 'admin:municipalities']
+    assert split_layers(features, typenames) == {
+        'admin:provinces': features[:1], 'admin:municipalities': features[1:]}
+    assert split_layers(features + [{'properties': {}}], typenames) is None
+    assert split_layers([{'id': 'roads.3'}], typenames) is None
+
+
+def create_wms_services(point: Point) -> list:
+    services = [
+        ServiceF.create(
+            query_type='WMS', url='https://example.com/wms', srid=4326,
+            service_version='1.3.0', layer_typename=typename, layer_name='name',
+            return_geometry=False)
+        for typename in ['admin:provinces', 'admin:municipalities']
+    ]
+    return [AsyncService(service, point, 10.0) for service in services]
+
+
+@pytest.mark.django_db
+def test_gather_services_wms_layers(settings, monkeypatch):
+    settings.WMS_BATCH_LAYERS = True
+    calls = []
+
+    async def fetch_features(self):
+        calls.append(list(self.layers))
+        return [
+            {'id': 'provinces.1', 'properties': {'name': 'Western Cape'}},
+            {'id': 'municipalities.7', 'properties': {'name': 'City of Cape Town'}},
+        ]
+
+    monkeypatch.setattr(AsyncService, 'fetch_features', fetch_features)
+    async_services = create_wms_services(Point(18.4, -33.9, srid=4326))
+    asyncio.run(gather_services(None, async_services))
+    assert calls == [['admin:provinces', 'admin:municipalities']]
+    assert [util.value for util in async_services] == [
+        'Western Cape', 'City of Cape Town']
+
+
+@pytest.mark.django_db
+def test_gather_services_wms_layers_without_ids(settings, monkeypatch):
+    settings.WMS_BATCH_LAYERS = True
+    calls = []
+    names = {'admin:provinces': 'Western Cape', 'admin:municipalities': 'Cape Town'}
+
+    async def fetch_features(self):
+        calls.append(list(self.layers))
+        return [{'properties': {'name': names[typename]}} for typename in self.layers]
+
+    monkeypatch.setattr(AsyncService, 'fetch_features', fetch_features)
+    async_services = create_wms_services(Point(18.4, -33.9, srid=4326))
+    asyncio.run(gather_services(None, async_services))
+    assert calls == [
+        ['admin:provinces', 'admin:municipalities'],
+        ['admin:provinces'],
+        ['admin:municipalities'],
+    ]
+    assert [util.value for util in async_services] == ['Western Cape', 'Cape Town']
@@ -0,0 +1,77 @@
+import pytest
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+
+from geocontext.utilities.circuit_breaker import (
+    allow_request, allow_requests, breaker_keys, record_failure, record_success,
+    record_successes
+)
+
+
+SHARED_DATABASE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'geocontext_shared_cache',
+    },
+}
+
+
+def test_circuit_breaker_opens_and_recovers(settings):
+    settings.CIRCUIT_BREAKER_ENABLED = True
+    settings.CIRCUIT_BREAKER_THRESHOLD = 2
+    settings.CIRCUIT_BREAKER_COOLDOWN = 30
+    caches['shared'].clear()
+
+    record_failure(1)
+    assert allow_request(1)
+    record_failure(1)
+    assert not allow_request(1)
+    assert allow_request(2)
+
+    # After the cooldown a single trial request is allowed
+    settings.CIRCUIT_BREAKER_COOLDOWN = 0
+    assert allow_request(1)
+    assert not allow_request(1)
+    record_success(1)
+    assert allow_request(1)
+    assert allow_request(1)
+    caches['shared'].clear()
+
+
+@pytest.mark.django_db
+def test_circuit_breaker_shared_between_processes(settings):
+    settings.CACHES = SHARED_DATABASE_CACHES
+    call_command('createcachetable')
+    settings.CIRCUIT_BREAKER_ENABLED = True
+    settings.CIRCUIT_BREAKER_THRESHOLD = 1
+    settings.CIRCUIT_BREAKER_COOLDOWN = 0
+
+    # Another worker process reads the same table through its own backend
+    other = DatabaseCache('geocontext_shared_cache', {})
+    record_failure(1)
+    _, opened_key, trial_key = breaker_keys(1)
+    assert other.get(opened_key) is not None
+
+    # The half-open trial is taken once across processes
+    assert allow_request(1)
+    assert not other.add(trial_key, 1)
+    record_success(1)
+    assert other.get(opened_key) is None
+
+
+@pytest.mark.django_db
+def test_circuit_breaker_batched_queries(settings, django_assert_num_queries):
+    settings.CACHES = SHARED_DATABASE_CACHES
+    call_command('createcachetable')
+    settings.CIRCUIT_BREAKER_ENABLED = True
+    service_ids = list(range(1, 61))
+
+    # Healthy services: one read before and one after the requests
+    with django_assert_num_queries(2):
+        assert allow_requests(service_ids) == set(service_ids)
+        record_successes(service_ids)
@@ -1,8 +1,11 @@
 import pytest
 
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import LineString, Point, Polygon
 
-from geocontext.utilities.geometry import flatten, parse_coord
+from geocontext.utilities.geometry import (
+    containment_geometry, count_coordinates, flatten, grid_points, parse_coord,
+    snap_point
+)
 
 
 def test_flatten_ignore_2d():
@@ -63,3 +66,52 @@ def test_parse_coord_invalid_coordinates():
     y = '24°27\'22.0"S'
     with pytest.raises(ValueError):
         parse_coord(x, y)
+
+
+def test_count_coordinates_geojson():
+    polygon = {
+        'type': 'MultiPolygon',
+        'coordinates': [[[[0, 0], [0, 1], [1, 1], [0, 0]]], [[[2, 2], [2, 3], [3, 3]]]]
+    }
+    assert count_coordinates(polygon) == 7
+    assert count_coordinates({'type': 'Point', 'coordinates': [1, 2]}) == 1
+
+
+def test_count_coordinates_arcrest():
+    assert count_coordinates({'rings': [[[0, 0], [0, 1], [1, 1], [0, 0]]]}) == 4
+    assert count_coordinates({'x': 1, 'y': 2}) == 1
+    assert count_coordinates(None) == 0
+
+
+def test_snap_point_cell_within_tolerance():
+    tolerance = 10
+    assert snap_point(Point(0.5, 0.5, srid=3857), tolerance) == (0, 0)
+    assert snap_point(Point(7.0, 7.0, srid=3857), tolerance) == (0, 0)
+    assert snap_point(Point(7.1, 0.5, srid=3857), tolerance) == (1, 0)
+    assert snap_point(Point(-0.5, 0.5, srid=3857), tolerance) == (-1, 0)
+
+
+def test_containment_geometry_clips_polygon():
+    polygon = Polygon.from_bbox((-10000, -10000, 10000, 10000))
+    polygon.srid = 3857
+    point = Point(0, 0, srid=3857)
+    area = containment_geometry(polygon, point, 10, 1000, 1)
+    assert area.extent == (-1000, -1000, 1000, 1000)
+    assert area.contains(point)
+
+
+def test_containment_geometry_buffers_lines():
+    line = LineString((0, 0), (100, 0), srid=3857)
+    point = Point(50, 5, srid=3857)
+    area = containment_geometry(line, point, 10, 1000, 1)
+    assert area.geom_type == 'Polygon'
+    assert area.contains(point)
+    assert not area.contains(Point(50, 20, srid=3857))
+
+
+def test_grid_points_cell_centers():
+    area = Polygon.from_bbox((0, 0, 14.1, 7))
+    area.srid = 3857
+    points = list(grid_points(area, 10))
+    assert [snap_point(point, 10) for point in points] == [(0, 0), (1, 0)]
+    assert all(area.contains(point) for point in points)
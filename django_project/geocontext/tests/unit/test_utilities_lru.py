@@ -0,0 +1,32 @@
+from geocontext.utilities.lru import LRUCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats() == {
+        'entries': 2, 'bytes': 0, 'hits': 2, 'misses': 1, 'evictions': 1}
+
+
+def test_lru_expires_entries():
+    cache = LRUCache(max_entries=2, ttl=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+    cache.set('b', 2, ttl=60)
+    assert cache.get('b') == 2
+
+
+def test_lru_evicts_above_max_bytes():
+    cache = LRUCache(max_entries=10, max_bytes=10)
+    cache.set('a', 1, size=6)
+    cache.set('b', 2, size=4)
+    cache.set('c', 3, size=2)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 6
+    cache.set('d', 4, size=11)
+    assert cache.get('d') is None
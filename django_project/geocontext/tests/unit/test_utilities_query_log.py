@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from django.contrib.gis.geos import Point
+
+from geocontext.models.log import Log
+from geocontext.utilities.query_log import QueryLogger
+
+
+def log(query_logger: QueryLogger, count: int = 1):
+    for _ in range(count):
+        query_logger.log('group', 'rivers', Point(18.4, -33.9, srid=4326), 10, 'json')
+
+
+def wait_for_logs(count: int) -> int:
+    deadline = time.monotonic() + 5
+    while Log.objects.count() < count and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return Log.objects.count()
+
+
+@pytest.mark.django_db
+def test_query_log_sync(settings):
+    settings.QUERY_LOG_MODE = 'sync'
+    query_logger = QueryLogger()
+    log(query_logger)
+    assert Log.objects.count() == 1
+    assert query_logger.thread is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_query_log_batched(settings):
+    settings.QUERY_LOG_MODE = 'batched'
+    settings.QUERY_LOG_BATCH_SIZE = 3
+    settings.QUERY_LOG_FLUSH_INTERVAL = 60
+    query_logger = QueryLogger()
+    log(query_logger, 2)
+    assert Log.objects.count() == 0
+
+    # A full batch wakes the flush thread
+    log(query_logger)
+    assert wait_for_logs(3) == 3
+    assert query_logger.buffer == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_query_log_flushed_when_idle(settings):
+    settings.QUERY_LOG_MODE = 'batched'
+    settings.QUERY_LOG_BATCH_SIZE = 500
+    settings.QUERY_LOG_FLUSH_INTERVAL = 0.1
+    query_logger = QueryLogger()
+    log(query_logger)
+    # Saved without further queries
+    assert wait_for_logs(1) == 1
+
+
+@pytest.mark.django_db
+def test_query_log_sampled(settings):
+    settings.QUERY_LOG_MODE = 'sampled'
+    settings.QUERY_LOG_FLUSH_INTERVAL = 60
+    query_logger = QueryLogger()
+    settings.QUERY_LOG_SAMPLE_RATE = 0
+    log(query_logger, 10)
+    assert query_logger.buffer == []
+
+    settings.QUERY_LOG_SAMPLE_RATE = 1
+    log(query_logger, 10)
+    assert len(query_logger.buffer) == 10
+    query_logger.flush()
+    assert Log.objects.count() == 10
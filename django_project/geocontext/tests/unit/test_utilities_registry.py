@@ -0,0 +1,91 @@
+import pytest
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.db import transaction
+
+from geocontext.tests.unit.model_factories import (
+    CollectionF, CollectionGroupsF, GroupF, GroupServicesF, ServiceF
+)
+from geocontext.utilities import registry as registry_module
+from geocontext.utilities.registry import REGISTRY_VERSION_KEY, get_registry
+
+
+SHARED_DATABASE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'geocontext_shared_cache',
+    },
+}
+
+
+@pytest.mark.django_db
+def test_registry_ordered_services():
+    service_1 = ServiceF.create()
+    service_2 = ServiceF.create()
+    group = GroupF.create()
+    GroupServicesF.create(group=group, service=service_1, order=1)
+    GroupServicesF.create(group=group, service=service_2, order=0)
+    collection = CollectionF.create()
+    CollectionGroupsF.create(collection=collection, group=group)
+
+    registry = get_registry()
+    assert registry.get_services('group', group.key) == (service_2, service_1)
+    assert registry.get_services('collection', collection.key) == (service_2, service_1)
+    assert registry.get_serial('collection', collection.key)['groups'] == [group.key]
+
+
+@pytest.mark.django_db
+def test_registry_invalidated_on_save(django_assert_num_queries):
+    service = ServiceF.create()
+    registry = get_registry()
+    with django_assert_num_queries(0):
+        assert get_registry() is registry
+
+    service.name = 'Renamed service'
+    service.save()
+    assert get_registry() is not registry
+    assert get_registry().services[service.key].name == 'Renamed service'
+
+    # Status-only saves of availability checks keep the snapshot
+    registry = get_registry()
+    service.status = False
+    service.save(update_fields=['status'])
+    assert get_registry() is registry
+
+
+@pytest.mark.django_db(transaction=True)
+def test_registry_version_bumped_on_commit():
+    service = ServiceF.create()
+    version = caches['shared'].get(REGISTRY_VERSION_KEY, 0)
+    with transaction.atomic():
+        service.name = 'Renamed service'
+        service.save()
+        assert caches['shared'].get(REGISTRY_VERSION_KEY, 0) == version
+    assert caches['shared'].get(REGISTRY_VERSION_KEY, 0) > version
+
+
+@pytest.mark.django_db
+def test_registry_version_polled(settings, monkeypatch, django_assert_num_queries):
+    settings.CACHES = SHARED_DATABASE_CACHES
+    call_command('createcachetable')
+    settings.REGISTRY_VERSION_POLL_INTERVAL = 60
+    monkeypatch.setattr(registry_module, '_version', (0, None))
+    ServiceF.create()
+    registry = get_registry()
+
+    # Lookups within the poll interval do not read the shared cache table
+    with django_assert_num_queries(0):
+        for _ in range(10):
+            assert get_registry() is registry
+
+    # A version bumped by another process is read once the interval passed
+    other = DatabaseCache('geocontext_shared_cache', {})
+    other.set(REGISTRY_VERSION_KEY, registry.version + 1, None)
+    assert get_registry() is registry
+    settings.REGISTRY_VERSION_POLL_INTERVAL = 0
+    assert get_registry() is not registry
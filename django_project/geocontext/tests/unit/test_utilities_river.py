@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from django.db import connection
+from django.urls import reverse
+
+from geocontext.utilities import river
+from geocontext.utilities.river import RiverDatabasePool
+
+
+@pytest.fixture
+def river_database(settings, monkeypatch):
+    """Use the test database as river database with a stub finder function."""
+    database = connection.settings_dict
+    settings.RIVER_DATABASE = {
+        'NAME': database['NAME'],
+        'USER': database['USER'],
+        'PASSWORD': database['PASSWORD'],
+        'HOST': database['HOST'] or 'localhost',
+        'PORT': database['PORT'] or 5432,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE OR REPLACE FUNCTION finder(x float8, y float8) "
+            "RETURNS TABLE(name text) AS $$ "
+            "SELECT 'Orange River'::text WHERE x > 0 $$ LANGUAGE sql")
+    river_pool = RiverDatabasePool()
+    monkeypatch.setattr(river, 'river_pool', river_pool)
+    yield river_pool
+    if river_pool.pool is not None:
+        river_pool.pool.closeall()
+    with connection.cursor() as cursor:
+        cursor.execute('DROP FUNCTION finder(float8, float8)')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_river_pool_new_connection_checked(settings, river_database):
+    # New connections are health checked on first use in autocommit mode
+    settings.RIVER_DATABASE_POOL_CHECK_INTERVAL = 0
+    with river_database.connection() as conn:
+        assert conn.autocommit
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    with river_database.connection() as reused:
+        assert reused is conn
+
+    # Connections closed by the server are replaced
+    conn.close()
+    with river_database.connection() as replaced:
+        assert replaced is not conn
+        assert replaced.autocommit
+
+
+@pytest.mark.django_db(transaction=True)
+def test_river_name_pool_exhausted(settings, client, river_database):
+    settings.RIVER_DATABASE_POOL_MAX = 1
+    settings.RIVER_DATABASE_POOL_TIMEOUT = 0.01
+    with river_database.connection():
+        response = client.get(reverse('river-name-api', kwargs={'x': 1, 'y': 1}))
+    assert response.status_code == 503
+
+    response = client.get(reverse('river-name-api', kwargs={'x': 1, 'y': 1}))
+    assert response.status_code == 200
+    assert response.data == 'Orange River'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_river_name_batch(client, river_database):
+    response = client.post(
+        reverse('river-name-batch-api'),
+        json.dumps({'points': [[1, 1], [-1, 1], [2, 2]]}),
+        content_type='application/json')
+    assert response.status_code == 200
+    assert response.data == ['Orange River', None, 'Orange River']
+
+    response = client.post(
+        reverse('river-name-batch-api'),
+        json.dumps({'points': 'not points'}),
+        content_type='application/json')
+    assert response.status_code == 400
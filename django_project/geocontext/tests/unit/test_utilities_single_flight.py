@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from django.db import connection
+
+from geocontext.utilities import single_flight as flight
+from geocontext.utilities.single_flight import single_flight
+
+
+def advisory_locks() -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' "
+            "AND pid = pg_backend_pid() AND granted")
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_single_flight_acquire_and_release(settings):
+    settings.SINGLE_FLIGHT_ENABLED = True
+    with single_flight([2, 1, 2]) as acquired:
+        assert acquired
+        assert advisory_locks() == 2
+    assert advisory_locks() == 0
+    assert flight._local_locks == {}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_single_flight_queries_constant(settings, django_assert_num_queries):
+    settings.SINGLE_FLIGHT_ENABLED = True
+    # One statement takes and one releases the advisory locks of all keys
+    with django_assert_num_queries(2):
+        with single_flight(list(range(50))) as acquired:
+            assert acquired
+    assert advisory_locks() == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_single_flight_timeout(settings):
+    settings.SINGLE_FLIGHT_ENABLED = True
+    settings.SINGLE_FLIGHT_TIMEOUT = 0.1
+    leading = threading.Event()
+    done = threading.Event()
+
+    def leader():
+        with single_flight([1]):
+            leading.set()
+            done.wait(5)
+        connection.close()
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    assert leading.wait(5)
+    # The follower gives up after the timeout and continues without the lock
+    with single_flight([1]) as acquired:
+        assert not acquired
+    done.set()
+    thread.join()
+
+    with single_flight([1]) as acquired:
+        assert acquired
+    assert advisory_locks() == 0
+    assert flight._local_locks == {}
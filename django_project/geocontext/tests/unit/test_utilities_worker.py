@@ -1,8 +1,266 @@
-from django.contrib.gis.geos import Point
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+import pytz
 
-from geocontext.utilities.geometry import flatten
+from django.contrib.gis.geos import Point, Polygon
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from geocontext.tests.unit.model_factories import (
+    CollectionF, CollectionGroupsF, GroupF, GroupServicesF, ServiceF
+)
+from geocontext.models.cache import Cache
+from geocontext.models.response_cache import ResponseCache
+from geocontext.utilities.geometry import flatten, transform
+from geocontext.utilities.registry import bump_registry_version, get_registry
+from geocontext.utilities.single_flight import flight_key
+from geocontext.utilities.worker import BatchWorker, CELL_CACHE, RESULT_CACHE, Worker
 
 
 def test_flatten_ignore_2d():
     point = Point(1, 2)
     assert point == flatten(point)
+
+
+def create_collection(num_services: int) -> tuple:
+    """Create a collection with two groups sharing num_services services."""
+    collection = CollectionF.create()
+    for group_order in range(2):
+        group = GroupF.create()
+        CollectionGroupsF.create(collection=collection, group=group, order=group_order)
+        for order in range(num_services):
+            GroupServicesF.create(group=group, service=ServiceF.create(), order=order)
+    return collection, group
+
+
+def count_queries(registry: str, key: str) -> int:
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    get_registry()
+    with CaptureQueriesContext(connection) as context:
+        Worker(registry, key, point, 10, 'json').retrieve_all()
+        Worker(registry, key, point, 10, 'json').retrieve_all()
+    return len(context)
+
+
+@pytest.mark.django_db
+def test_worker_order_queries_constant():
+    small_collection, small_group = create_collection(1)
+    large_collection, large_group = create_collection(6)
+
+    assert count_queries('group', small_group.key) == count_queries(
+        'group', large_group.key)
+    assert count_queries('collection', small_collection.key) == count_queries(
+        'collection', large_collection.key)
+
+
+@pytest.mark.django_db
+def test_worker_service_order():
+    collection, group = create_collection(3)
+    worker = Worker('collection', collection.key, Point(0, 0, srid=4326), 10, 'json')
+    services = worker.get_services()
+    assert len(services) == 6
+    assert [worker.get_order(service.id) for service in services] == list(range(6))
+
+
+@pytest.mark.django_db
+def test_worker_nest_caches_no_queries(django_assert_num_queries):
+    collection, group = create_collection(3)
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    worker = Worker('collection', collection.key, point, 10, 'json')
+    caches = worker.retrieve_all() and worker.retrieve_caches(worker.get_services())
+
+    with django_assert_num_queries(0):
+        serial = worker.nest_caches(caches)
+    assert [len(group_serial['services']) for group_serial in serial['groups']] == [3, 3]
+
+
+@pytest.mark.django_db
+def test_worker_result_cache_hit(settings, django_assert_num_queries):
+    settings.RESULT_CACHE_LOCAL = True
+    RESULT_CACHE.clear()
+    collection, group = create_collection(2)
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    serial = Worker('collection', collection.key, point, 10, 'json').retrieve_all()
+
+    nearby = Point(22.91015268, -32.53952446, srid=4326)
+    # Only the query logs are saved
+    with django_assert_num_queries(2):
+        assert Worker(
+            'collection', collection.key, nearby, 10, 'json').retrieve_all() == serial
+        feature = Worker(
+            'collection', collection.key, nearby, 10, 'geojson').retrieve_all()
+    assert feature['properties'] == serial
+    assert feature['geometry']['coordinates'] == [nearby.x, nearby.y]
+
+    # A registry edit committed by another process changes the result key
+    worker = Worker('collection', collection.key, nearby, 10, 'json')
+    result_key = worker.result_key()
+    bump_registry_version()
+    assert worker.result_key() != result_key
+    RESULT_CACHE.clear()
+
+
+@pytest.mark.django_db
+def test_worker_stale_while_revalidate():
+    service = ServiceF.create(stale_while_revalidate=3600)
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    for expired in [now - timedelta(minutes=10), now - timedelta(hours=2)]:
+        Cache.objects.create(
+            service=service, name=service.key, value='stale',
+            geometry=transform(point, Cache.srid), created_time=now,
+            expired_time=expired)
+    worker = Worker('service', service.key, point, 10, 'json', log=False)
+
+    caches = worker.retrieve_caches(worker.get_services())
+    assert len(caches) == 1
+    assert caches[0].stale
+    assert worker.nest_caches(caches)['stale'] is True
+    assert worker.result_ttl(caches) <= 0
+
+    service.stale_while_revalidate = None
+    service.save()
+    worker = Worker('service', service.key, point, 10, 'json', log=False)
+    assert worker.retrieve_caches(worker.get_services()) == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_refresh_failed_keeps_stale(monkeypatch):
+    service = ServiceF.create(stale_while_revalidate=3600)
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    Cache.objects.create(
+        service=service, name=service.key, value='stale',
+        geometry=transform(point, Cache.srid), created_time=now,
+        expired_time=now - timedelta(minutes=10))
+    monkeypatch.setattr(
+        'geocontext.utilities.worker.async_retrieve_services',
+        lambda async_services: [SimpleNamespace(value=None, failed=True)])
+    worker = Worker('service', service.key, point, 10, 'json', log=False)
+
+    worker.refresh(service, flight_key(service.id, point, 10))
+    assert list(Cache.objects.values_list('value', flat=True)) == ['stale']
+
+
+@pytest.mark.django_db
+def test_worker_bulk_create_caches_upsert(settings):
+    settings.CACHE_NEGATIVE_TTL = 60
+    service = ServiceF.create()
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    worker = Worker('service', service.key, point, 10, 'json', log=False)
+
+    def async_service(value):
+        return SimpleNamespace(
+            service=service, key=service.key, value=value, source_uri=None, failed=False,
+            expire=now + timedelta(days=1), geometry=point, point=point,
+            point_cache=transform(point, Cache.srid), tolerance=10)
+
+    first = worker.bulk_create_caches([async_service('a'), async_service('b')])
+    assert Cache.objects.count() == 1
+    assert first[0].pk == first[1].pk
+    assert Cache.objects.get().value == 'b'
+
+    # A failed request keeps the stored value
+    assert worker.bulk_create_caches([async_service(None)])[0].pk is None
+    assert Cache.objects.get().value == 'b'
+
+    other = Point(22.92, -32.54, srid=4326)
+    failed = async_service(None)
+    failed.geometry = failed.point = other
+    assert worker.bulk_create_caches([failed])[0].pk is not None
+    cache = Cache.objects.get(value=None)
+    assert cache.expired_time <= now + timedelta(seconds=61)
+    assert worker.bulk_create_caches([async_service('c')])[0].pk == first[0].pk
+
+    unsaved = async_service(None)
+    unsaved.failed = True
+    unsaved.geometry = unsaved.point = Point(22.94, -32.56, srid=4326)
+    assert worker.bulk_create_caches([unsaved])[0].pk is None
+
+    settings.CACHE_NEGATIVE_TTL = 0
+    unsaved = async_service(None)
+    unsaved.geometry = unsaved.point = Point(22.93, -32.55, srid=4326)
+    assert worker.bulk_create_caches([unsaved])[0].pk is None
+    assert Cache.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_worker_cell_key_lookup(settings):
+    settings.CACHE_CELL_KEYS = True
+    CELL_CACHE.clear()
+    service = ServiceF.create(tolerance=None)
+    area = Polygon.from_bbox((22.9, -32.55, 22.92, -32.53))
+    area.srid = 4326
+    point = Point(22.910152673721317, -32.53952445888535, srid=4326)
+    other = Point(22.915, -32.545, srid=4326)
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+
+    def async_service(query_point):
+        return SimpleNamespace(
+            service=service, key=service.key, value='area', source_uri=None,
+            failed=False, expire=now + timedelta(days=1), geometry=area,
+            point=query_point, point_cache=transform(query_point, Cache.srid),
+            tolerance=10)
+
+    worker = Worker('service', service.key, point, 10, 'json', log=False)
+    other_worker = Worker('service', service.key, other, 10, 'json', log=False)
+    shared = worker.bulk_create_caches([async_service(point)])[0]
+    other_worker.bulk_create_caches([async_service(other)])
+    assert Cache.objects.count() == 1
+
+    # The shared row keeps the cell key of the point that created it
+    CELL_CACHE.clear()
+    caches = worker.retrieve_cell_caches(worker.get_services())
+    assert [cache.pk for cache in caches] == [shared.pk]
+    assert other_worker.retrieve_cell_caches(other_worker.get_services()) == []
+    caches = other_worker.retrieve_caches(other_worker.get_services())
+    assert [cache.pk for cache in caches] == [shared.pk]
+    CELL_CACHE.clear()
+
+
+@pytest.mark.django_db
+def test_batch_worker_nearest_cache_per_service():
+    service = ServiceF.create(tolerance=None)
+    other_service = ServiceF.create(tolerance=None)
+    points = [
+        Point(22.910152673721317, -32.53952445888535, srid=4326),
+        Point(22.92, -32.54, srid=4326),
+    ]
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    for index, point in enumerate(points):
+        center = transform(point, Cache.srid)
+        for cache_service, offset in [(service, 8), (service, 3), (other_service, 6)]:
+            Cache.objects.create(
+                service=cache_service, name=cache_service.key,
+                value=f'{index}:{offset}',
+                geometry=Point(center.x + offset, center.y, srid=Cache.srid),
+                created_time=now, expired_time=now + timedelta(hours=1))
+
+    worker = BatchWorker('service', service.key, points, 10, 'json', log=False)
+    point_caches = worker.retrieve_caches([service, other_service])
+    for index in range(len(points)):
+        values = {cache.service_id: cache.value for cache in point_caches[index]}
+        assert values == {service.id: f'{index}:3', other_service.id: f'{index}:6'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_clear_results_related_responses():
+    collection, group = create_collection(1)
+    service = group.services.first()
+    other = ServiceF.create()
+    now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    for registry, key in [
+            ('service', service.key), ('group', group.key),
+            ('collection', collection.key), ('service', other.key)]:
+        ResponseCache.objects.create(
+            registry=registry, key=key, cell_key=key[:32], body='{}',
+            created_time=now, expired_time=now + timedelta(hours=1))
+
+    service.status = False
+    service.save(update_fields=['status'])
+    assert ResponseCache.objects.count() == 4
+
+    service.save()
+    assert list(ResponseCache.objects.values_list('key', flat=True)) == [other.key]
@@ -0,0 +1,30 @@
+from geocontext.utilities.xml import CapabilitiesParser
+
+CAPABILITIES = b"""<?xml version="1.0" encoding="UTF-8"?>
+<WMS_Capabilities version="1.3.0" xmlns="http://www.opengis.net/wms">
+  <Capability>
+    <Layer>
+      <Title>GeoServer</Title>
+      <Layer>
+        <Name>sa_provinces</Name>
+        <BoundingBox CRS="EPSG:4326" minx="-35" miny="16" maxx="-22" maxy="33"/>
+      </Layer>
+      <Layer>
+        <Name>sa_rivers</Name>
+        <BoundingBox CRS="EPSG:3857" minx="1" miny="2" maxx="3" maxy="4"/>
+      </Layer>
+"""
+
+
+def test_capabilities_parser_stops_at_layer():
+    parser = CapabilitiesParser('geocontext:sa_provinces')
+    found = [parser.feed(CAPABILITIES[i:i + 64]) for i in range(0, 320, 64)]
+    assert found[-1]
+    assert parser.result == {'srs': 'EPSG:4326', 'bbox': '-35,16,-22,33'}
+    assert 'sa_rivers' not in parser.layers
+
+
+def test_capabilities_parser_collects_layers():
+    parser = CapabilitiesParser('missing')
+    assert not parser.feed(CAPABILITIES)
+    assert parser.layers['sa_rivers'] == {'srs': 'EPSG:3857', 'bbox': '1,2,3,4'}
@@ -2,6 +2,7 @@ from rest_framework import throttling
 
 from django.conf import settings
 
+from geocontext.authentication import TOKEN_CACHE
 from geocontext.models import UserProfile
 
 
@@ -17,14 +18,51 @@ class UserTierRateThrottle(throttling.UserRateThrottle):
             token = request.auth.key
             if not token:
                 return False
-            user = UserProfile.objects.filter(
-                user__auth_token__key=token
-            ).first()
-            if user and user.user_tier:
-                self.rate = user.user_tier.request_limit
+            rate = self.get_tier_rate(token)
+            if rate:
+                self.rate = rate
                 if self.rate == '-': # Unlimited, always true
                     return True
         else:
             return True
         self.num_requests, self.duration = self.parse_rate(self.rate)
-        return super(UserTierRateThrottle, self).allow_request(request, view)
+        self.cost = 1
+        if hasattr(view, 'get_throttle_cost'):
+            self.cost = view.get_throttle_cost(request)
+        if self.cost == 1:
+            return super(UserTierRateThrottle, self).allow_request(request, view)
+
+        # Requests counting as several requests (batch queries) are only allowed
+        # if the full cost fits in the remaining limit
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.history = self.cache.get(self.key, [])
+        self.now = self.timer()
+        while self.history and self.history[-1] <= self.now - self.duration:
+            self.history.pop()
+        if len(self.history) + self.cost > self.num_requests:
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def throttle_success(self):
+        """
+        Record the request in the history once per request it counts for.
+        """
+        self.history[:0] = [self.now] * getattr(self, 'cost', 1)
+        self.cache.set(self.key, self.history, self.duration)
+        return True
+
+    def get_tier_rate(self, token):
+        """
+        Return request limit of the user tier for a token (cached per process).
+        An empty string is cached for users without a tier.
+        """
+        rate = TOKEN_CACHE.get(('rate', token))
+        if rate is None:
+            user = UserProfile.objects.filter(
+                user__auth_token__key=token
+            ).select_related('user_tier').first()
+            rate = user.user_tier.request_limit if user and user.user_tier else ''
+            TOKEN_CACHE.set(('rate', token), rate)
+        return rate
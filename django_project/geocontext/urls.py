@@ -9,8 +9,11 @@ from geocontext.views.api_v1 import (
     ServiceDetailAPIView,
     ServiceListAPIView,
     RiverNameAPIView,
+    RiverNameBatchAPIView,
+)
+from geocontext.views.api_v2 import (
+    BatchAPIView, GenericAPIView, RegistryAPIView, StatsAPIView
 )
-from geocontext.views.api_v2 import GenericAPIView, RegistryAPIView
 from geocontext.views.collection import CollectionListView, CollectionDetailView
 from geocontext.views.service import ServiceListView, ServiceDetailView
 from geocontext.views.group import GroupListView, GroupDetailView
@@ -74,6 +77,10 @@ urlpatterns_api_v1 = [
         view=RiverNameAPIView.as_view(),
         name='river-name-api'
         ),
+    url(regex=r'^geocontext/river-name/batch/$',
+        view=RiverNameBatchAPIView.as_view(),
+        name='river-name-batch-api'
+        ),
 ]
 
 urlpatterns_api_v1 = format_suffix_patterns(urlpatterns_api_v1)
@@ -83,9 +90,17 @@ urlpatterns_api_v2 = [
         view=GenericAPIView.as_view(),
         name='service-api'
         ),
+    url(regex=r'^query/batch$',
+        view=BatchAPIView.as_view(),
+        name='batch-api'
+        ),
     url(regex=r'^registries$',
         view=RegistryAPIView.as_view(),
         name='registries-api'
+        ),
+    url(regex=r'^stats$',
+        view=StatsAPIView.as_view(),
+        name='stats-api'
         )
 ]
 
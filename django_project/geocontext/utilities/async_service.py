@@ -8,40 +8,288 @@ from datetime import datetime as dt
 from datetime import timedelta as td
 from functools import partial
 import logging
+import multiprocessing
+import os
 from pytz import UTC
-import sys
-import requests
+import json
+import threading
+from urllib.parse import urlparse
 import aiohttp
-from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.forms.models import model_to_dict
 from django.http import QueryDict
 
 from geocontext.models.cache import Cache
 from geocontext.models.service import Service
-from geocontext.utilities.geometry import get_bbox, parse_geometry, transform
+from geocontext.utilities.circuit_breaker import (
+    allow_requests, record_failure, record_successes
+)
+from geocontext.utilities.geometry import (
+    count_coordinates, get_bbox, parse_geometry, transform
+)
+from geocontext.utilities.session import run_in_session
 from geocontext.utilities.value import format_value
-from geocontext.utilities.xml import get_bounding_box_srs
+from geocontext.utilities.lru import LRUCache
+from geocontext.utilities.xml import CapabilitiesParser, find_layer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 LOGGER = logging.getLogger(__name__)
 
+# Parsed capabilities layers per (service url, query type, version)
+CAPABILITIES_CACHE = LRUCache(
+    max_entries=settings.CAPABILITIES_CACHE_ENTRIES, ttl=settings.CAPABILITIES_CACHE_TTL)
+
+# Bounded process pool for parsing large geometries - created lazily per process.
+_geometry_executor = None
+_geometry_executor_pid = None
+_geometry_executor_lock = threading.Lock()
+GEOMETRY_POOL_STATS = {'pool': 0, 'inline': 0}
+
+
+def get_geometry_executor() -> ProcessPoolExecutor:
+    """Return process pool for geometry parsing. A new pool is created after a fork,
+    as pools inherited from a parent process (e.g. uWSGI master) are not usable.
+    Pool workers are started by a fork server, not forked from this process.
+
+    :return: Process pool executor
+    :rtype: ProcessPoolExecutor
+    """
+    global _geometry_executor, _geometry_executor_pid
+    with _geometry_executor_lock:
+        if _geometry_executor is None or _geometry_executor_pid != os.getpid():
+            # Workers are started from a fork server - forking this process copies
+            # locks held by its threads (event loop, uWSGI threads) into the child
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['geocontext.utilities.geometry'])
+            _geometry_executor = ProcessPoolExecutor(
+                max_workers=settings.GEOMETRY_POOL_WORKERS, mp_context=context)
+            _geometry_executor_pid = os.getpid()
+        return _geometry_executor
+
+
+def geometry_pool_stats() -> dict:
+    """Return counts of geometries parsed in the process pool or inline.
+
+    :return: Counters
+    :rtype: dict
+    """
+    with _geometry_executor_lock:
+        return dict(GEOMETRY_POOL_STATS)
+
 
-@async_to_sync
-async def async_retrieve_services(async_services: list) -> list:
-    """Load AsyncService instance and load with external data using async aiohttp session.
+def async_retrieve_services(async_services: list, concurrency: int = None,
+                            host_rate: float = None) -> list:
+    """Load AsyncService instance and load with external data using the shared
+    process-wide aiohttp session.
 
     :param async_services: AsyncService list
     :type async_services: list
+    :param concurrency: Maximum number of requests in flight (None for no limit)
+    :type concurrency: int
+    :param host_rate: Maximum requests per second per upstream host (None for no limit)
+    :type host_rate: float
 
     :return: List of AsyncService with values
     :rtype: list
     """
-    conn = aiohttp.TCPConnector(limit=100)
-    timeout = aiohttp.ClientTimeout(total=20, connect=2)
-    async with aiohttp.ClientSession(connector=conn, timeout=timeout) as session:
-        tasks = [ensure_future(util.retrieve_values(session)) for util in async_services]
-        new_async_services = await gather(*tasks)
-    return new_async_services
+    # Services with an open circuit breaker fail fast without a request
+    allowed = allow_requests([util.service.id for util in async_services])
+    requested = []
+    for async_service in async_services:
+        if async_service.service.id in allowed:
+            requested.append(async_service)
+        else:
+            async_service.failed = True
+
+    run_in_session(gather_services, requested, concurrency, host_rate)
+
+    failed = {}
+    for async_service in requested:
+        service_id = async_service.service.id
+        failed[service_id] = failed.get(service_id, True) and async_service.failed
+    for service_id, service_failed in failed.items():
+        if service_failed:
+            record_failure(service_id)
+    record_successes([
+        service_id for service_id, service_failed in failed.items()
+        if not service_failed])
+    return async_services
+
+
+async def gather_services(session: aiohttp.ClientSession, async_services: list,
+                          concurrency: int = None, host_rate: float = None) -> list:
+    """Retrieve values for all AsyncService instances concurrently.
+
+    :param session: shared http session
+    :type session: aiohttp.ClientSession
+    :param async_services: AsyncService list
+    :type async_services: list
+    :param concurrency: Maximum number of requests in flight (None for no limit)
+    :type concurrency: int
+    :param host_rate: Maximum requests per second per upstream host (None for no limit)
+    :type host_rate: float
+
+    :return: List of AsyncService with values
+    :rtype: list
+    """
+    # Services only differing in the property read share one upstream request - WMS
+    # services on the same server also share it across layers (WMS_BATCH_LAYERS)
+    groups = {}
+    for util in async_services:
+        groups.setdefault(util.request_key(), []).append(util)
+
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+    host_slots = {}
+
+    async def retrieve(members):
+        leader = members[0]
+        if host_rate:
+            # Reserve the next free request slot of the host before waiting
+            loop = asyncio.get_running_loop()
+            host = urlparse(leader.url).netloc
+            slot = max(loop.time(), host_slots.get(host, 0))
+            host_slots[host] = slot + 1 / host_rate
+            await asyncio.sleep(slot - loop.time())
+        if semaphore is None:
+            return await leader.retrieve_values(session, members)
+        async with semaphore:
+            return await leader.retrieve_values(session, members)
+
+    await gather(*[ensure_future(retrieve(members)) for members in groups.values()])
+    return async_services
+
+
+class ResponseTooLarge(ValueError):
+    """Upstream response exceeds UPSTREAM_MAX_RESPONSE_BYTES."""
+
+
+async def read_body(response: aiohttp.ClientResponse, max_bytes: int) -> bytes:
+    """Read response body in chunks up to max_bytes.
+
+    :param response: Upstream response
+    :type response: aiohttp.ClientResponse
+    :param max_bytes: Maximum body size
+    :type max_bytes: int
+    :raises ResponseTooLarge: If the body is larger than max_bytes
+    :return: Response body
+    :rtype: bytes
+    """
+    if response.content_length is not None and response.content_length > max_bytes:
+        raise ResponseTooLarge(f'Response of {response.content_length} bytes too large')
+    body = bytearray()
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise ResponseTooLarge(f'Response larger than {max_bytes} bytes')
+    return bytes(body)
+
+
+def decode_json(body: bytes):
+    """Decode json with orjson if installed. Servers sending control characters in
+    strings (e.g. ArcREST) are decoded with the lenient standard library decoder.
+
+    :param body: json document
+    :type body: bytes
+    :raises ValueError: If body is not json
+    :return: Decoded json
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError:
+        return json.loads(body.decode('utf-8', errors='replace'), strict=False)
+
+
+def decode_features(body: bytes, features: str, layer_names: list):
+    """Decode json body and prune its feature list.
+
+    :param body: json document
+    :type body: bytes
+    :param features: Key of the feature list (None for the full document)
+    :type features: str
+    :param layer_names: Properties holding service values
+    :type layer_names: list
+    :return: Decoded json or dict of the pruned feature list
+    """
+    json_response = decode_json(body)
+    if features is None:
+        return json_response
+    return {features: prune_features(json_response[features], layer_names)}
+
+
+def prune_features(features: list, layer_names: list) -> list:
+    """Keep only the layer_names properties and geometry of features, so discarded
+    attributes are not held in memory or sent to the geometry process pool.
+
+    :param features: Features (geojson features or ArcREST/GeoNames results)
+    :type features: list
+    :param layer_names: Properties holding service values
+    :type layer_names: list
+    :return: Pruned features
+    :rtype: list
+    """
+    pruned = []
+    for feature in features:
+        if not isinstance(feature, dict):
+            continue
+        if 'properties' in feature:
+            properties = feature['properties'] or {}
+            item = {'properties': {
+                name: properties[name] for name in layer_names if name in properties}}
+        else:
+            item = {name: feature[name] for name in layer_names if name in feature}
+        if 'id' in feature:
+            item['id'] = feature['id']
+        if 'geometry' in feature:
+            item['geometry'] = feature['geometry']
+        pruned.append(item)
+    return pruned
+
+
+def split_layers(features: list, typenames: list) -> dict:
+    """Split features of a multi-layer GetFeatureInfo response by layer. The layer
+    is read from the feature id prefix, e.g. "layer.12" (GeoServer).
+
+    :param features: Geojson features
+    :type features: list
+    :param typenames: Layer typenames with or without workspace, e.g. workspace:layer
+    :type typenames: list
+    :return: Dict of typename to features or None if a feature id has no layer prefix
+    :rtype: dict
+    """
+    layers = {}
+    for typename in typenames:
+        layers[typename] = typename
+        layers.setdefault(typename.split(':')[-1], typename)
+    split = {typename: [] for typename in typenames}
+    for feature in features:
+        typename = layers.get(str(feature.get('id', '')).rsplit('.', 1)[0])
+        if typename is None:
+            return None
+        split[typename].append(feature)
+    return split
+
+
+def get_tolerance(service: Service, tolerance: float) -> float:
+    """Return tolerance used for a service: the query tolerance if it is not the
+    default, else the service tolerance.
+
+    :param service: Service instance
+    :type service: Service
+    :param tolerance: Query tolerance in meter
+    :type tolerance: float
+    :return: Service query tolerance
+    :rtype: float
+    """
+    if tolerance != 10.0:
+        return tolerance
+    return service.tolerance if service.tolerance is not None else 10.0
 
 
 class AsyncService():
@@ -65,65 +313,180 @@ class AsyncService():
             setattr(self, key, val)
 
         # Service query configuration
-        if tolerance != 10.0:
-            self.tolerance = tolerance
-        elif self.tolerance is None:
-            self.tolerance = 10.0
+        self.tolerance = get_tolerance(service, tolerance)
         self.point = transform(point, self.srid)
         self.point_cache = transform(point, Cache.srid)
         self.max_features = 10
         self.source_uri = None
         self.group_key = None
         self.session = None
+        self.failed = False
+        # Layer typenames and properties requested - all member layers and properties
+        # when sharing a request
+        self.layers = {self.layer_typename: [self.layer_name]}
+        self.properties = [self.layer_name]
         self.expire = dt.utcnow().replace(tzinfo=UTC) + td(seconds=self.cache_duration)
 
         # Data that can retrieved form service - geometry defaults to query point
         self.value = None
         self.geometry = self.point
 
-    async def retrieve_values(self, session: aiohttp.ClientSession) -> bool:
+    def request_key(self) -> tuple:
+        """Upstream request signature. Services with the same key send the same
+        request and only differ in the property read from the features - or for
+        WMS with WMS_BATCH_LAYERS also in the layer queried.
+
+        :return: Request key
+        :rtype: tuple
+        """
+        return (
+            self.query_type,
+            self.url,
+            None if self.batch_layers() else self.layer_typename,
+            self.service_version,
+            self.srid,
+            self.point.x,
+            self.point.y,
+            self.tolerance,
+            self.layer_geometry_field,
+            self.return_geometry,
+            self.geometry_precision,
+            self.geometry_simplify,
+            self.username,
+            # ArcREST layer_name selects the layer queried
+            self.layer_name if self.query_type == 'ArcREST' else None,
+        )
+
+    def batch_layers(self) -> bool:
+        """Check if the service layer may be queried with other layers in one
+        multi-layer GetFeatureInfo request.
+
+        :return: Layer batching enabled
+        :rtype: bool
+        """
+        return self.query_type == 'WMS' and settings.WMS_BATCH_LAYERS
+
+    async def retrieve_values(self, session: aiohttp.ClientSession,
+                              members: list = None) -> bool:
         """Load context value and geometry from service.
-        Service exceptions / logging handled here.
+        Service exceptions / logging handled here. With members (AsyncService
+        instances with the same request_key, including this one) one request is
+        made for the layers and properties of all members and each member reads its
+        value from the shared features of its layer.
 
         :param session: shared http session
         :type session: aiohttp.ClientSession
+        :param members: AsyncService instances sharing the request
+        :type members: list
         """
+        members = [self] if members is None else members
         self.session = session
+        self.layers = {}
+        for member in members:
+            properties = self.layers.setdefault(member.layer_typename, [])
+            if member.layer_name not in properties:
+                properties.append(member.layer_name)
+        self.properties = list(dict.fromkeys(member.layer_name for member in members))
+        saved = []
         try:
-            if self.query_type == 'WMS':
-                await self.fetch_wms()
-            elif self.query_type == 'WFS':
-                await self.fetch_wfs()
-            elif self.query_type == 'ArcREST':
-                await self.fetch_arcrest()
-            elif self.query_type == 'PlaceName':
-                await self.fetch_placename()
-            else:
-                LOGGER.error(f'"{self.query_type}" not implimented: {self.key}')
-        except IndexError:
-            LOGGER.error(f'"{self.source_uri}" No features found for: {self.key}')
-        except Exception as e:
-            try:
-                await self.fetch_sql_view()
-            except Exception as e:
-                LOGGER.error(f'{self.source_uri}" failed for: {self.key} with: {e}')
+            features = await self.fetch_features()
+            layers = {self.layer_typename: features}
+            if len(self.layers) > 1:
+                layers = split_layers(features, list(self.layers))
+                if layers is None:
+                    LOGGER.info(
+                        f'"{self.source_uri}" features without layer id - '
+                        f'querying layers separately')
+                    return await self.retrieve_layers(session, members)
+            # Geometries are parsed once per feature for all members of a layer
+            geometries = {}
+            for member in members:
+                member.source_uri = self.source_uri
+                await member.save_features(
+                    layers[member.layer_typename],
+                    geometries.setdefault(member.layer_typename, {}))
+                saved.append(member)
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+            # The SQL view fallback would query the same unreachable server
+            for member in members:
+                member.failed = True
+            LOGGER.error(f'{self.source_uri}" unreachable for: {self.key} with: {e}')
+        except ResponseTooLarge as e:
+            for member in members:
+                member.failed = True
+            LOGGER.error(f'{self.source_uri}" failed for: {self.key} with: {e}')
+        except Exception:
+            # Members whose features were read before the error keep their value
+            for member in members:
+                if member in saved:
+                    continue
+                member.session = session
+                try:
+                    await member.fetch_sql_view()
+                except Exception as e:
+                    member.failed = True
+                    LOGGER.error(
+                        f'{member.source_uri}" failed for: {member.key} with: {e}')
 
         # Return AsyncService instance with attributes loaded from service
         return self
 
-    async def fetch_wms(self):
-        """Fetch WMS value"""
+    async def retrieve_layers(self, session: aiohttp.ClientSession,
+                              members: list) -> bool:
+        """Load values of members with one request per layer.
+
+        :param session: shared http session
+        :type session: aiohttp.ClientSession
+        :param members: AsyncService instances of several layers
+        :type members: list
+        """
+        layers = {}
+        for member in members:
+            layers.setdefault(member.layer_typename, []).append(member)
+        for layer_members in layers.values():
+            await layer_members[0].retrieve_values(session, layer_members)
+        return self
+
+    async def fetch_features(self) -> list:
+        """Fetch features of service query type.
+
+        :return: Features
+        :rtype: list
+        """
+        if self.query_type == 'WMS':
+            return await self.fetch_wms()
+        elif self.query_type == 'WFS':
+            return await self.fetch_wfs()
+        elif self.query_type == 'ArcREST':
+            return await self.fetch_arcrest()
+        elif self.query_type == 'PlaceName':
+            return await self.fetch_placename()
+        LOGGER.error(f'"{self.query_type}" not implimented: {self.key}')
+        return []
+
+    async def fetch_wms(self) -> list:
+        """Fetch WMS features. All layers are queried in one request - the feature
+        count limit is raised accordingly.
+        """
         bbox = get_bbox(self.point, self.tolerance)
+        layers = ','.join(self.layers)
         parameters = {
             'SERVICE': self.query_type,
             'INFO_FORMAT': 'application/json',
-            'LAYERS': self.layer_typename,
-            'QUERY_LAYERS': self.layer_typename,
-            'FEATURE_COUNT': self.max_features,
+            'LAYERS': layers,
+            'QUERY_LAYERS': layers,
+            'FEATURE_COUNT': self.max_features * len(self.layers),
             'BBOX': bbox,
             'WIDTH': 101,
             'HEIGHT': 101
         }
+        if not self.return_geometry:
+            # GeoServer vendor parameter - ignored by other servers
+            if len(self.layers) == 1:
+                parameters['PROPERTYNAME'] = ','.join(self.properties)
+            else:
+                parameters['PROPERTYNAME'] = ''.join(
+                    f'({",".join(properties)})' for properties in self.layers.values())
 
         if self.service_version in ['1.0.0', '1.1.0', '1.1.1']:
             parameters.update({
@@ -139,14 +502,13 @@ class AsyncService():
             })
         else:
             LOGGER.error(f"'{self.service_version}' not a supported WMS service.")
-            return
+            return []
 
-        json_response = await self.request_data(parameters)
+        json_response = await self.request_data(parameters, features='features')
+        return json_response['features']
 
-        await self.save_features(json_response['features'])
-
-    async def fetch_wfs(self):
-        """Fetch WFS value. Try intersect else buffer with specified tolerance."""
+    async def fetch_wfs(self) -> list:
+        """Fetch WFS features. Try intersect else buffer with specified tolerance."""
         geometry = self.layer_geometry_field if self.layer_geometry_field is not None else 'geom'
         parameters = {
             'SERVICE': 'WFS',
@@ -154,7 +516,10 @@ class AsyncService():
             'OUTPUTFORMAT': 'application/json',
             'VERSION': self.service_version,
             'TYPENAME': self.layer_typename,
-            'PROPERTYNAME': f'({self.layer_name})',
+            'PROPERTYNAME': '({})'.format(','.join(
+                self.properties + [geometry] if self.return_geometry
+                else self.properties)),
+            'SRSNAME': f'EPSG:{self.point.srid}',
             'FILTER': (
                 '<Filter xmlns="http://www.opengis.net/ogc" '
                 'xmlns:gml="http://www.opengis.net/gml"> '
@@ -174,25 +539,24 @@ class AsyncService():
             })
         else:
             LOGGER.error(f"'{self.service_version}' not a supported WFS service.")
-            return
+            return []
 
-        json_response = await self.request_data(parameters)
+        json_response = await self.request_data(parameters, features='features')
         if len(json_response['features']) != 0:
-            return await self.save_features(json_response['features'])
+            return json_response['features']
 
         LOGGER.info(f'WFS intersect filter failed: "{self.key}" - attempt bbox')
         parameters.pop('FILTER')
         bbox = get_bbox(self.point, self.tolerance)
         parameters.update({
-            'BBOX': bbox,
-            'SRSNAME': f'EPSG:{self.point.srid}'
+            'BBOX': bbox
         })
 
-        json_response = await self.request_data(parameters)
-        await self.save_features(json_response['features'])
+        json_response = await self.request_data(parameters, features='features')
+        return json_response['features']
 
-    async def fetch_arcrest(self):
-        """Fetch ArcRest value"""
+    async def fetch_arcrest(self) -> list:
+        """Fetch ArcRest features"""
         bbox = get_bbox(self.point, self.tolerance)
         parameters = {
             'f': 'json',
@@ -202,54 +566,87 @@ class AsyncService():
             'imageDisplay': '100,100,96',
             'tolerance': '1',
             'mapExtent': bbox,
-            'returnGeometry': 'true',
+            'returnGeometry': 'true' if self.return_geometry else 'false',
             'maxRecordCount': self.max_features
         }
-        json_response = await self.request_data(parameters, query='identify?')
-        await self.save_features(json_response['results'])
-
-    async def fetch_placename(self):
-        """Fetch Placename value"""
+        if self.return_geometry and self.geometry_precision is not None:
+            parameters['geometryPrecision'] = self.geometry_precision
+        if self.return_geometry and self.geometry_simplify:
+            # Offset is in units of the service srid - degrees for geographic srids
+            offset = self.geometry_simplify
+            if self.point.srs is not None and self.point.srs.geographic:
+                offset = offset / 111320
+            parameters['maxAllowableOffset'] = offset
+        json_response = await self.request_data(
+            parameters, query='identify?', features='results')
+        return json_response['results']
+
+    async def fetch_placename(self) -> list:
+        """Fetch Placename features"""
         parameters = {
             'lat': str(self.point.y),
             'lng': str(self.point.x),
             'username': str(self.username),
         }
-        json_response = await self.request_data(parameters)
-        await self.save_features(json_response['geonames'])
+        json_response = await self.request_data(parameters, features='geonames')
+        return json_response['geonames']
+
+    def get_uri(self, parameters: dict, query: str = '?') -> str:
+        """Encode service URL with query parameters.
+
+        :param parameters: parameters to urlencode
+        :type parameters: dict
+        :param query: Url query delimiter
+        :type query: str (default '?')
+        :return: URL
+        :rtype: str
+        """
+        query_dict = QueryDict('', mutable=True)
+        query_dict.update(parameters)
+        query = '&' if '?' in self.url and query == '?' else query
+        return f'{self.url}{query}{query_dict.urlencode()}'
 
-    async def request_data(self, parameters: dict, query: str = '?') -> dict:
+    async def request_data(self, parameters: dict, query: str = '?',
+                           features: str = None) -> dict:
         """Encodes query URL from querydict and fetches json data with async session.
+        Responses are read up to UPSTREAM_MAX_RESPONSE_BYTES - bodies larger than
+        UPSTREAM_DECODE_THREAD_BYTES are decoded in a thread, so other requests of
+        the event loop keep running.
 
         :param parameters: parameters to urlencode
         :type parameters: dict
         :param query: Url query delimiter
         :type query: str (default '?')
+        :param features: Key of the feature list - only this list is returned,
+            pruned to the requested properties and geometry (default full response)
+        :type features: str
         :raises ValueError: If value can not be parsed.
         :return: json response
         :rtype: dict
         """
-        query_dict = QueryDict('', mutable=True)
-        query_dict.update(parameters)
-        query = '&' if '?' in self.url and query == '?' else query
-        self.source_uri = f'{self.url}{query}{query_dict.urlencode()}'
+        self.source_uri = self.get_uri(parameters, query)
 
-        # Async session - disable validation - some servers, like ArrcREST, send bad json.
+        # Content type is not validated - some servers, like ArcREST, send bad headers.
         async with self.session.get(self.source_uri, raise_for_status=True) as response:
-            try:
-                return await response.json(content_type=None)
-            except Exception:
-                return requests.get(self.source_uri)
-
-    async def save_features(self, features: list):
+            body = await read_body(response, settings.UPSTREAM_MAX_RESPONSE_BYTES)
+        if len(body) > settings.UPSTREAM_DECODE_THREAD_BYTES:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, decode_features, body, features, self.properties)
+        return decode_features(body, features, self.properties)
+
+    async def save_features(self, features: list, geometries: dict = None):
         """Find and store results: {value:geometry} attribute.
 
         :param feature: geojson futures list
         :type feature: dict
+        :param geometries: Parsed geometries by feature index - shared by services
+            reading the same features (default None)
+        :type geometries: dict
         """
         results = []
-        for feature in features:
-            result = {}
+        for index, feature in enumerate(features):
+            result = {'index': index}
             # We don't want to raise error if one feature fails - just skip
             try:
                 if 'properties' in feature:
@@ -262,7 +659,8 @@ class AsyncService():
 
             # We don't want to raise error if no geometry found - don't parse in async
             try:
-                result['geom'] = feature['geometry']
+                if self.return_geometry:
+                    result['geom'] = feature['geometry']
             except Exception:
                 LOGGER.info(f'No geometry found for feature in: "{self.key}"')
 
@@ -270,28 +668,41 @@ class AsyncService():
 
         # Multiple value/geometry results per query possible - find nearest
         if len(results) != 0:
-            await self.nearest_geometry_value(results)
+            await self.nearest_geometry_value(results, geometries)
 
-    async def nearest_geometry_value(self, results: list) -> list:
+    async def nearest_geometry_value(self, results: list, geometries: dict = None):
         """Find value and geometry closest to query in async_service results list.
         Large complex geometries block async - so spin up processes for these.
 
         :param results: result list of val:geom dicts
         :type results: list
+        :param geometries: Parsed geometries by feature index, filled while parsing
+            (default None)
+        :type geometries: dict
         """
         dist = 1000000
         self.value = results[0]['val']
+        threshold = settings.GEOMETRY_POOL_MIN_COORDINATES
+        if geometries is None:
+            geometries = {}
         for result in results:
-            arc = True if self.query_type == 'ArcREST' else False
-            func = partial(parse_geometry, result['geom'], arc)
-
-            # Processes are costly - only for large objects (threshold could be tweaked)
-            if sys.getsizeof(result['geom']) > 100:
-                loop = asyncio.get_running_loop()
-                exe = ProcessPoolExecutor(max_workers=1)
-                geometry = await loop.run_in_executor(exe, func)
+            if result['index'] in geometries:
+                geometry = geometries[result['index']]
             else:
-                geometry = func()
+                arc = True if self.query_type == 'ArcREST' else False
+                func = partial(parse_geometry, result.get('geom'), arc)
+
+                # Processes are costly - only for geometries with many coordinates
+                if count_coordinates(result.get('geom')) > threshold:
+                    with _geometry_executor_lock:
+                        GEOMETRY_POOL_STATS['pool'] += 1
+                    loop = asyncio.get_running_loop()
+                    geometry = await loop.run_in_executor(get_geometry_executor(), func)
+                else:
+                    with _geometry_executor_lock:
+                        GEOMETRY_POOL_STATS['inline'] += 1
+                    geometry = func()
+                geometries[result['index']] = geometry
             if geometry is not None:
                 new_dist = self.point.distance(geometry)
                 if new_dist < dist:
@@ -299,20 +710,41 @@ class AsyncService():
                     self.value = result['val']
                     self.geometry = geometry
 
-    async def get_capabilities(self):
+    async def get_capabilities(self) -> dict:
+        """Return bounding box and srs of the service layer from the capabilities
+        document. Layers are cached parsed per service url and version - the
+        document is only read up to the requested layer.
+
+        :raises ValueError: If the layer is not in the capabilities document
+        :return: Layer bounding box and srs
+        :rtype: dict
+        """
+        version = '2.0.1'
+        key = (self.url, self.query_type, version)
+        layers = CAPABILITIES_CACHE.get(key, {})
+        bbox_srs = find_layer(layers, self.layer_typename)
+        if bbox_srs is not None:
+            return bbox_srs
 
         parameters = {
             'SERVICE': self.query_type,
-            'version': '2.0.1',
+            'version': version,
             'REQUEST': 'GetCapabilities'
         }
-        xml_response = await self.request_data(parameters)
-        return xml_response.content
+        parser = CapabilitiesParser(self.layer_typename)
+        async with self.session.get(
+                self.get_uri(parameters), raise_for_status=True) as response:
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                if parser.feed(chunk):
+                    break
+        CAPABILITIES_CACHE.set(key, {**layers, **parser.layers})
+        if parser.result is None:
+            raise ValueError(f'Layer {self.layer_typename} not found in capabilities')
+        return parser.result
 
     async def fetch_sql_view(self):
 
-        xml = await self.get_capabilities()
-        bbox_srs = get_bounding_box_srs(self.layer_typename, xml)
+        bbox_srs = await self.get_capabilities()
 
         parameters = {
             'REQUEST': 'GetMap',
@@ -327,5 +759,5 @@ class AsyncService():
             'srs': bbox_srs['srs']
 
         }
-        json_response = await self.request_data(parameters)
+        json_response = await self.request_data(parameters, features='features')
         await self.save_features(json_response['features'])
@@ -0,0 +1,112 @@
+"""
+Module with a per service circuit breaker shared by worker processes
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+LOGGER = logging.getLogger(__name__)
+
+
+def breaker_keys(service_id: int) -> tuple:
+    """Return cache keys of failure count, open time and half-open trial of service.
+
+    :param service_id: Service id
+    :type service_id: int
+    :return: Failures, opened and trial cache keys
+    :rtype: tuple
+    """
+    prefix = f'geocontext_breaker_{service_id}'
+    return f'{prefix}_failures', f'{prefix}_opened', f'{prefix}_trial'
+
+
+def allow_requests(service_ids: list) -> set:
+    """Return services whose upstream may be requested, reading the breakers of all
+    services at once. Closed: requests are allowed. Open: requests fail fast until
+    CIRCUIT_BREAKER_COOLDOWN seconds passed. Half-open: a single trial request is
+    allowed across processes - its outcome closes or reopens the breaker.
+
+    :param service_ids: Service ids
+    :type service_ids: list
+    :return: Ids of services that may be requested
+    :rtype: set
+    """
+    service_ids = set(service_ids)
+    if not settings.CIRCUIT_BREAKER_ENABLED or len(service_ids) == 0:
+        return service_ids
+    cache = caches['shared']
+    opened_keys = {breaker_keys(service_id)[1]: service_id for service_id in service_ids}
+    opened = cache.get_many(list(opened_keys))
+
+    allowed = set(service_ids)
+    for opened_key, opened_time in opened.items():
+        service_id = opened_keys[opened_key]
+        if time.time() - opened_time < settings.CIRCUIT_BREAKER_COOLDOWN:
+            allowed.discard(service_id)
+        # The trial lasts at most one upstream request timeout
+        elif not cache.add(
+                breaker_keys(service_id)[2], 1, settings.UPSTREAM_HTTP_TIMEOUT):
+            allowed.discard(service_id)
+    return allowed
+
+
+def allow_request(service_id: int) -> bool:
+    """Check if a request to the service upstream may be made.
+
+    :param service_id: Service id
+    :type service_id: int
+    :return: Request allowed
+    :rtype: bool
+    """
+    return service_id in allow_requests([service_id])
+
+
+def record_successes(service_ids: list):
+    """Close breakers of services after successful requests. Breaker state is only
+    deleted if any exists.
+
+    :param service_ids: Service ids
+    :type service_ids: list
+    """
+    if not settings.CIRCUIT_BREAKER_ENABLED or len(service_ids) == 0:
+        return
+    cache = caches['shared']
+    keys = [key for service_id in service_ids for key in breaker_keys(service_id)]
+    existing = list(cache.get_many(keys))
+    if len(existing) > 0:
+        cache.delete_many(existing)
+
+
+def record_success(service_id: int):
+    """Close breaker of service after a successful request.
+
+    :param service_id: Service id
+    :type service_id: int
+    """
+    record_successes([service_id])
+
+
+def record_failure(service_id: int):
+    """Count failed request of service - the breaker opens after
+    CIRCUIT_BREAKER_THRESHOLD failures within CIRCUIT_BREAKER_WINDOW seconds or when
+    a half-open trial request fails.
+
+    :param service_id: Service id
+    :type service_id: int
+    """
+    if not settings.CIRCUIT_BREAKER_ENABLED:
+        return
+    cache = caches['shared']
+    failures_key, opened_key, trial_key = breaker_keys(service_id)
+    cache.add(failures_key, 0, settings.CIRCUIT_BREAKER_WINDOW)
+    try:
+        failures = cache.incr(failures_key)
+    except ValueError:
+        failures = 1
+    if failures >= settings.CIRCUIT_BREAKER_THRESHOLD or cache.get(opened_key):
+        if cache.get(opened_key) is None:
+            LOGGER.warning(f'Circuit breaker opened for service {service_id}')
+        cache.set(opened_key, time.time(), None)
+        cache.delete(trial_key)
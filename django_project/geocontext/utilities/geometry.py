@@ -1,11 +1,13 @@
 """Model with geometric helper functions"""
+import hashlib
 import json
+import math
 import re
 
 from arcgis2geojson import arcgis2geojson
 import geopy
 import geopy.distance
-from django.contrib.gis.geos import GEOSGeometry, Point
+from django.contrib.gis.geos import GEOSGeometry, Point, Polygon
 
 
 def flatten(geometry: GEOSGeometry) -> GEOSGeometry:
@@ -134,6 +136,69 @@ def parse_coord(x: str, y: str, srid: str = '4326') -> float:
     return Point(coords['x'], coords['y'], srid=srid)
 
 
+def parse_points(points, srid: str = '4326') -> list:
+    """Parse a list of coordinates or a GeoJSON FeatureCollection to points.
+    Coordinates can be [x, y] pairs or {'x': x, 'y': y} objects.
+
+    :param points: Coordinate list or GeoJSON FeatureCollection
+    :type points: list or dict
+    :param srid: SRID (default=4326).
+    :type srid: int
+    :raises ValueError: If points could not be parsed
+    :return: list of points with srid
+    :rtype: list
+    """
+    if isinstance(points, dict):
+        if points.get('type') != 'FeatureCollection':
+            raise ValueError('Points should be a list or a GeoJSON FeatureCollection')
+        coords = []
+        for feature in points.get('features', []):
+            geometry = feature.get('geometry') or {}
+            if geometry.get('type') != 'Point':
+                raise ValueError('GeoJSON features should have Point geometries')
+            coords.append(geometry['coordinates'][:2])
+    elif isinstance(points, list):
+        coords = points
+    else:
+        raise ValueError('Points should be a list or a GeoJSON FeatureCollection')
+
+    parsed = []
+    for coord in coords:
+        if isinstance(coord, dict):
+            coord = [coord.get('x'), coord.get('y')]
+        if not isinstance(coord, (list, tuple)) or len(coord) < 2 or None in coord[:2]:
+            raise ValueError(f"Point '{coord}' should have an x and y coordinate")
+        parsed.append(parse_coord(str(coord[0]), str(coord[1]), srid))
+    return parsed
+
+
+def count_coordinates(geometry) -> int:
+    """Count coordinate pairs in a GeoJSON or ArcREST geometry without parsing it.
+
+    :param geometry: GeoJSON / ArcREST geometry dict (or nested coordinate list)
+    :type geometry: dict
+    :return: Number of coordinate pairs
+    :rtype: int
+    """
+    if isinstance(geometry, str):
+        # Serialized geometry - estimate from separators to avoid decoding it
+        return (geometry.count(',') + 1) // 2
+    if isinstance(geometry, dict):
+        if 'geometries' in geometry:
+            return sum(count_coordinates(g) for g in geometry['geometries'])
+        for member in ['coordinates', 'rings', 'paths', 'points']:
+            if member in geometry:
+                return count_coordinates(geometry[member])
+        return 1 if 'x' in geometry and 'y' in geometry else 0
+    if isinstance(geometry, (list, tuple)):
+        if len(geometry) == 0:
+            return 0
+        if not isinstance(geometry[0], (list, tuple)):
+            return 1
+        return sum(count_coordinates(part) for part in geometry)
+    return 0
+
+
 def parse_geometry(geometry: dict, arc: bool = False) -> GEOSGeometry:
     """Parse geometry from string or json to GEOSGeometry.
     Large geometries parsed through arcgis could block async.
@@ -159,6 +224,99 @@ def parse_geometry(geometry: dict, arc: bool = False) -> GEOSGeometry:
         return None
 
 
+def snap_point(point: Point, tolerance: float, srid: int = 3857) -> tuple:
+    """Snap point to a square grid cell in srid. The cell side is tolerance / sqrt(2)
+    so any two points in the same cell are within tolerance of each other.
+
+    :param point: Point
+    :type point: Point
+    :param tolerance: Tolerance in meters (units of srid)
+    :type tolerance: float
+    :param srid: Grid SRID (default 3857)
+    :type srid: int
+    :return: Grid cell column and row
+    :rtype: tuple
+    """
+    point = transform(point, srid)
+    size = max(tolerance, 0.001) / math.sqrt(2)
+    return (math.floor(point.x / size), math.floor(point.y / size))
+
+
+def grid_points(geometry: GEOSGeometry, tolerance: float, srid: int = 3857):
+    """Yield centers of the tolerance grid cells (see snap_point) inside geometry,
+    row by row from the lower left corner.
+
+    :param geometry: Area geometry
+    :type geometry: GEOSGeometry
+    :param tolerance: Tolerance in meters (units of srid)
+    :type tolerance: float
+    :param srid: Grid SRID (default 3857)
+    :type srid: int
+    :return: Generator of points in srid
+    :rtype: generator
+    """
+    geometry = transform(geometry, srid)
+    prepared = geometry.prepared
+    size = max(tolerance, 0.001) / math.sqrt(2)
+    min_x, min_y, max_x, max_y = geometry.extent
+    for row in range(math.floor(min_y / size), math.floor(max_y / size) + 1):
+        for column in range(math.floor(min_x / size), math.floor(max_x / size) + 1):
+            point = Point((column + 0.5) * size, (row + 0.5) * size, srid=srid)
+            if prepared.intersects(point):
+                yield point
+
+
+def cell_key(prefix: str, point: Point, tolerance: float) -> str:
+    """Hashed key of the tolerance grid cell (see snap_point) containing point.
+
+    :param prefix: Key prefix, e.g. service id
+    :type prefix: str
+    :param point: Point
+    :type point: Point
+    :param tolerance: Tolerance in meters
+    :type tolerance: float
+    :return: 32 character hex key
+    :rtype: str
+    """
+    column, row = snap_point(point, tolerance)
+    key = f'{prefix}:{float(tolerance)}:{column}:{row}'
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def containment_geometry(geometry: GEOSGeometry, point: Point, tolerance: float,
+                         clip: float, simplify: float) -> GEOSGeometry:
+    """Area in which a cached value is valid for containment cache lookups.
+    Polygons are clipped to a square of clip meters around the query point and
+    simplified, keeping intersection checks cheap. Other geometries are replaced
+    by a tolerance buffer around the query point. Works in the point srid (meters).
+
+    :param geometry: Feature geometry
+    :type geometry: GEOSGeometry
+    :param point: Query point
+    :type point: Point
+    :param tolerance: Query tolerance in meters
+    :type tolerance: float
+    :param clip: Half width of the clip square in meters
+    :type clip: float
+    :param simplify: Simplification tolerance in meters
+    :type simplify: float
+    :return: Polygonal geometry
+    :rtype: GEOSGeometry
+    """
+    geometry = transform(geometry, point.srid)
+    if geometry.geom_type in ['Polygon', 'MultiPolygon']:
+        window = Polygon.from_bbox(
+            (point.x - clip, point.y - clip, point.x + clip, point.y + clip))
+        window.srid = point.srid
+        area = geometry.intersection(window)
+        if simplify > 0:
+            area = area.simplify(simplify, preserve_topology=True)
+        if not area.empty and area.geom_type in ['Polygon', 'MultiPolygon']:
+            area.srid = point.srid
+            return area
+    return point.buffer(tolerance, quadsegs=4)
+
+
 def transform(geometry: GEOSGeometry, srid_target: int) -> GEOSGeometry:
     """Wrapper to transform geometry x y from srid_source to srid_target if required.
 
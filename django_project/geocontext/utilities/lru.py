@@ -0,0 +1,122 @@
+"""
+Module with a thread-safe in-process LRU cache
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class LRUCache():
+    """
+    Least recently used cache with a bounded number of entries (and optionally a
+    bounded total size of entries) and an optional time to live per entry. Hit,
+    miss and eviction counts are kept for monitoring. Values are stored per process
+    and are shared between threads.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = None,
+                 max_bytes: int = None):
+        """Load object
+
+        :param max_entries: Maximum number of entries
+        :type max_entries: int
+        :param ttl: Default entry time to live in seconds (None for no expiry)
+        :type ttl: float
+        :param max_bytes: Maximum total size of entries (None for no limit)
+        :type max_bytes: int
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return cached value or default if missing or expired.
+
+        :param key: Cache key
+        :type key: hashable
+        :param default: Returned when key is not cached
+        :return: Cached value
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] is not None:
+                if entry[1] <= time.monotonic():
+                    self.remove(key)
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl: float = None, size: int = 0):
+        """Cache value and evict least recently used entries above max_entries or
+        max_bytes. Values larger than max_bytes are not cached.
+
+        :param key: Cache key
+        :type key: hashable
+        :param value: Value to cache
+        :param ttl: Time to live in seconds (default cache ttl)
+        :type ttl: float
+        :param size: Size of value in bytes, counted against max_bytes
+        :type size: int
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            self.remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self.entries[key] = (value, expires, size)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def remove(self, key):
+        """Remove key from entries - caller holds the lock.
+
+        :param key: Cache key
+        :type key: hashable
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def delete(self, key):
+        """Remove key from cache.
+
+        :param key: Cache key
+        :type key: hashable
+        """
+        with self.lock:
+            self.remove(key)
+
+    def clear(self, **kwargs):
+        """Remove all entries. Can be used as a signal receiver."""
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Return cache counters.
+
+        :return: Entry count, total size, hits, misses and evictions
+        :rtype: dict
+        """
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,132 @@
+"""
+Module with buffered query logging to avoid a Log insert per request
+"""
+from datetime import datetime as dt
+import atexit
+import logging
+import os
+import random
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from pytz import UTC
+
+from geocontext.models.log import Log
+
+LOGGER = logging.getLogger(__name__)
+
+QUERY_LOG_MODES = ['sync', 'batched', 'sampled', 'off']
+
+
+class QueryLogger():
+    """
+    Collects Log records of a worker process. Depending on QUERY_LOG_MODE records
+    are saved directly (sync), buffered and bulk created when QUERY_LOG_BATCH_SIZE
+    records are waiting or every QUERY_LOG_FLUSH_INTERVAL seconds (batched), or
+    only a QUERY_LOG_SAMPLE_RATE fraction is buffered (sampled).
+    Buffered records are saved by a background thread of the process, so requests
+    never wait for the bulk insert. The buffer is flushed at process exit.
+    """
+
+    def __init__(self):
+        """Load object"""
+        self.buffer = []
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def log(self, registry: str, key: str, geometry, tolerance: float, outformat: str):
+        """Log query.
+
+        :param registry: Queried registry
+        :type registry: str
+        :param key: Queried key
+        :type key: str
+        :param geometry: Queried geometry
+        :type geometry: GEOSGeometry
+        :param tolerance: Query tolerance
+        :type tolerance: float
+        :param outformat: Output format
+        :type outformat: str
+        """
+        mode = settings.QUERY_LOG_MODE
+        if mode not in QUERY_LOG_MODES:
+            raise ValueError(f'Query log mode "{mode}" not supported')
+        if mode == 'off':
+            return
+        if mode == 'sampled' and random.random() >= settings.QUERY_LOG_SAMPLE_RATE:
+            return
+
+        log = Log(
+            registry=registry,
+            key=key,
+            geometry=geometry,
+            tolerance=tolerance,
+            output_format=outformat,
+            created_time=dt.utcnow().replace(tzinfo=UTC)
+        )
+        if mode == 'sync':
+            log.save()
+            return
+
+        with self.lock:
+            # Records buffered before a fork belong to the parent process, and its
+            # flush thread does not run in this process
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.buffer = []
+                self.wakeup = threading.Event()
+                self.thread = None
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='query-log-flush', daemon=True)
+                self.thread.start()
+            self.buffer.append(log)
+            if len(self.buffer) >= settings.QUERY_LOG_BATCH_SIZE:
+                self.wakeup.set()
+
+    def run(self):
+        """Flush buffered records every QUERY_LOG_FLUSH_INTERVAL seconds, or as soon
+        as a full batch is waiting - run in the flush thread.
+        """
+        while True:
+            self.wakeup.wait(settings.QUERY_LOG_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """Bulk create buffered records."""
+        with self.lock:
+            if self.pid != os.getpid():
+                return
+            logs, self.buffer = self.buffer, []
+        if len(logs) == 0:
+            return
+        try:
+            Log.objects.bulk_create(logs, batch_size=settings.QUERY_LOG_BATCH_SIZE)
+        except Exception as e:
+            LOGGER.error(f'Could not save {len(logs)} query logs: {e}')
+
+
+query_logger = QueryLogger()
+atexit.register(query_logger.flush)
+
+
+def log_query(registry: str, key: str, geometry, tolerance: float, outformat: str):
+    """Log query with the process query logger.
+
+    :param registry: Queried registry
+    :type registry: str
+    :param key: Queried key
+    :type key: str
+    :param geometry: Queried geometry
+    :type geometry: GEOSGeometry
+    :param tolerance: Query tolerance
+    :type tolerance: float
+    :param outformat: Output format
+    :type outformat: str
+    """
+    query_logger.log(registry, key, geometry, tolerance, outformat)
@@ -0,0 +1,201 @@
+"""
+Module with an in-memory snapshot of the service, group and collection registries
+"""
+from collections import namedtuple
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from geocontext.models.collection import Collection
+from geocontext.models.collection_groups import CollectionGroups
+from geocontext.models.group import Group
+from geocontext.models.group_services import GroupServices
+from geocontext.models.service import Service
+
+REGISTRY_VERSION_KEY = 'geocontext_registry_version'
+
+GroupEntry = namedtuple('GroupEntry', ['group', 'serial', 'services'])
+CollectionEntry = namedtuple('CollectionEntry', ['collection', 'serial', 'groups'])
+
+
+class RegistrySnapshot():
+    """
+    Immutable snapshot of registry metadata: services, ordered group services and
+    ordered collection groups with their serialized representation. Model instances
+    in the snapshot are shared between requests and should not be modified.
+    """
+
+    def __init__(self, version: int):
+        """Load all registries from the database.
+
+        :param version: Registry version the snapshot was built for
+        :type version: int
+        """
+        self.version = version
+        self.created = time.monotonic()
+
+        services = {service.id: service for service in Service.objects.all()}
+        self.services_by_id = MappingProxyType(services)
+        self.services = MappingProxyType(
+            {service.key: service for service in services.values()})
+
+        group_services = {}
+        for group_service in GroupServices.objects.order_by('group_id', 'order', 'id'):
+            group_services.setdefault(group_service.group_id, []).append(
+                services[group_service.service_id])
+
+        groups = {}
+        groups_by_id = {}
+        for group in Group.objects.all():
+            ordered = tuple(group_services.get(group.id, []))
+            serial = MappingProxyType({
+                'key': group.key,
+                'name': group.name,
+                'description': group.description,
+                'group_type': group.group_type,
+                'services': tuple(service.key for service in ordered)
+            })
+            groups_by_id[group.id] = GroupEntry(group, serial, ordered)
+            groups[group.key] = groups_by_id[group.id]
+        self.groups = MappingProxyType(groups)
+
+        collection_groups = {}
+        for collection_group in CollectionGroups.objects.order_by(
+                'collection_id', 'order', 'id'):
+            collection_groups.setdefault(collection_group.collection_id, []).append(
+                groups_by_id[collection_group.group_id])
+
+        collections = {}
+        for collection in Collection.objects.all():
+            ordered = tuple(collection_groups.get(collection.id, []))
+            serial = MappingProxyType({
+                'key': collection.key,
+                'name': collection.name,
+                'description': collection.description,
+                'groups': tuple(entry.group.key for entry in ordered)
+            })
+            collections[collection.key] = CollectionEntry(collection, serial, ordered)
+        self.collections = MappingProxyType(collections)
+
+    def get_services(self, registry: str, key: str) -> tuple:
+        """Return ordered services associated with a key in a registry.
+
+        :param registry: Service, Group or Collection registry.
+        :type registry: str
+        :param key: Service, Group or Collection key.
+        :type key: str
+        :return: Ordered services without duplicates
+        :rtype: tuple
+        """
+        if registry == 'service':
+            service = self.services.get(key)
+            return (service,) if service is not None else ()
+        elif registry == 'group':
+            entry = self.groups.get(key)
+            return entry.services if entry is not None else ()
+        elif registry == 'collection':
+            entry = self.collections.get(key)
+            if entry is None:
+                return ()
+            services = {}
+            for group_entry in entry.groups:
+                for service in group_entry.services:
+                    services.setdefault(service.id, service)
+            return tuple(services.values())
+        else:
+            raise ValueError(f'Registry "{registry}" not supported')
+
+    def get_serial(self, registry: str, key: str) -> dict:
+        """Return a copy of the serialized group or collection metadata.
+
+        :param registry: Group or Collection registry.
+        :type registry: str
+        :param key: Group or Collection key.
+        :type key: str
+        :raises ValueError: If key is not in registry
+        :return: Serialized metadata
+        :rtype: dict
+        """
+        entries = self.groups if registry == 'group' else self.collections
+        if key not in entries:
+            raise ValueError(f'{registry.capitalize()} "{key}" does not exist')
+        serial = dict(entries[key].serial)
+        for field in ['services', 'groups']:
+            if field in serial:
+                serial[field] = list(serial[field])
+        return serial
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_version = (0, None)
+
+
+def get_registry_version() -> int:
+    """Return shared registry version, read from the shared cache at most once per
+    REGISTRY_VERSION_POLL_INTERVAL seconds.
+
+    :return: Registry version
+    :rtype: int
+    """
+    global _version
+    checked, version = _version
+    if version is None or time.monotonic() - checked >= (
+            settings.REGISTRY_VERSION_POLL_INTERVAL):
+        version = caches['shared'].get(REGISTRY_VERSION_KEY, 0)
+        _version = (time.monotonic(), version)
+    return version
+
+
+def get_registry() -> RegistrySnapshot:
+    """Return registry snapshot for this process - rebuilt when invalidated, when the
+    shared version counter changed or when older than REGISTRY_SNAPSHOT_TTL seconds.
+
+    :return: Registry snapshot
+    :rtype: RegistrySnapshot
+    """
+    global _snapshot
+    version = get_registry_version()
+    ttl = settings.REGISTRY_SNAPSHOT_TTL
+    snapshot = _snapshot
+    if (snapshot is None or snapshot.version != version or
+            time.monotonic() - snapshot.created > ttl):
+        with _snapshot_lock:
+            snapshot = _snapshot
+            if (snapshot is None or snapshot.version != version or
+                    time.monotonic() - snapshot.created > ttl):
+                snapshot = RegistrySnapshot(version)
+                _snapshot = snapshot
+    return snapshot
+
+
+def invalidate_registry(update_fields=None, **kwargs):
+    """Drop registry snapshot and, once the transaction commits, bump the version
+    counter in the shared cache backend so that all processes rebuild their
+    snapshot from committed rows. Used as a receiver for model signals.
+
+    :param update_fields: Fields saved (None for all fields)
+    :type update_fields: frozenset
+    """
+    global _snapshot
+    # Service availability checks only update the status
+    if update_fields is not None and set(update_fields) <= {'status'}:
+        return
+    _snapshot = None
+    transaction.on_commit(bump_registry_version)
+
+
+def bump_registry_version():
+    """Drop registry snapshot and increment the shared registry version."""
+    global _snapshot, _version
+    _snapshot = None
+    try:
+        version = caches['shared'].incr(REGISTRY_VERSION_KEY)
+    except ValueError:
+        version = 1
+        caches['shared'].set(REGISTRY_VERSION_KEY, version, None)
+    _version = (time.monotonic(), version)
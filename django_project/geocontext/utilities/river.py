@@ -0,0 +1,154 @@
+"""
+Module with a bounded connection pool for the river name database
+"""
+from contextlib import contextmanager
+import logging
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import pool
+from django.conf import settings
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RiverDatabasePool():
+    """
+    Thread-safe pool of autocommit connections to RIVER_DATABASE. Connections idle
+    longer than RIVER_DATABASE_POOL_CHECK_INTERVAL seconds are health checked before
+    use. Waiting longer than RIVER_DATABASE_POOL_TIMEOUT for a free connection raises
+    PoolError. The pool is recreated after a fork.
+    """
+
+    def __init__(self):
+        """Load object"""
+        self.pid = None
+        self.pool = None
+        self.slots = None
+        self.last_used = {}
+        self.lock = threading.Lock()
+
+    def get_pool(self) -> pool.ThreadedConnectionPool:
+        """Return connection pool for this process.
+
+        :return: Connection pool
+        :rtype: ThreadedConnectionPool
+        """
+        with self.lock:
+            if self.pool is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.last_used = {}
+                self.slots = threading.BoundedSemaphore(settings.RIVER_DATABASE_POOL_MAX)
+                self.pool = pool.ThreadedConnectionPool(
+                    0,
+                    settings.RIVER_DATABASE_POOL_MAX,
+                    dbname=settings.RIVER_DATABASE['NAME'],
+                    user=settings.RIVER_DATABASE['USER'],
+                    password=settings.RIVER_DATABASE['PASSWORD'],
+                    host=settings.RIVER_DATABASE['HOST'],
+                    port=settings.RIVER_DATABASE['PORT'],
+                    connect_timeout=settings.RIVER_DATABASE_CONNECT_TIMEOUT
+                )
+            return self.pool
+
+    def is_healthy(self, conn) -> bool:
+        """Check connection is open - run a query if it was idle for a while.
+
+        :param conn: Database connection
+        :type conn: connection
+        :return: Connection health
+        :rtype: bool
+        """
+        if conn.closed:
+            return False
+        # Connections not used before were just opened by the pool
+        last_used = self.last_used.get(id(conn))
+        if last_used is None:
+            return True
+        if time.monotonic() - last_used < settings.RIVER_DATABASE_POOL_CHECK_INTERVAL:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, connection_pool: pool.ThreadedConnectionPool):
+        """Get connection from the pool in autocommit mode - set before any query so
+        that health checks do not open a transaction.
+
+        :param connection_pool: Connection pool
+        :type connection_pool: ThreadedConnectionPool
+        :return: Database connection
+        :rtype: connection
+        """
+        conn = connection_pool.getconn()
+        if not conn.closed and not conn.autocommit:
+            conn.autocommit = True
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Check out a healthy connection and return it to the pool afterwards.
+
+        :raises PoolError: If no connection is free within the pool timeout
+        :raises OperationalError: If the database can not be reached
+        """
+        connection_pool = self.get_pool()
+        slots = self.slots
+        if not slots.acquire(timeout=settings.RIVER_DATABASE_POOL_TIMEOUT):
+            raise pool.PoolError('River database connection pool exhausted')
+        conn = None
+        try:
+            conn = self.getconn(connection_pool)
+            if not self.is_healthy(conn):
+                LOGGER.info('Discarding broken river database connection')
+                self.last_used.pop(id(conn), None)
+                connection_pool.putconn(conn, close=True)
+                conn = self.getconn(connection_pool)
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if conn is not None:
+                self.last_used.pop(id(conn), None)
+                connection_pool.putconn(conn, close=True)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                if conn.closed:
+                    self.last_used.pop(id(conn), None)
+                else:
+                    self.last_used[id(conn)] = time.monotonic()
+                connection_pool.putconn(conn, close=bool(conn.closed))
+            slots.release()
+
+
+river_pool = RiverDatabasePool()
+
+
+def find_river_names(points: list) -> list:
+    """Find river names for points in a single round trip with the finder function.
+
+    :param points: List of points (EPSG:4326)
+    :type points: list
+    :return: River name (or None) per point
+    :rtype: list
+    """
+    query = """
+        SELECT p.idx, f.*
+        FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(x, y, idx)
+        LEFT JOIN LATERAL finder(p.x, p.y) AS f ON true
+        ORDER BY p.idx
+    """
+    names = [None] * len(points)
+    with river_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                query, [[point.x for point in points], [point.y for point in points]])
+            for row in cursor.fetchall():
+                if names[row[0] - 1] is None:
+                    names[row[0] - 1] = row[1]
+    return names
@@ -0,0 +1,105 @@
+"""
+Module with a long-lived event loop and aiohttp session shared by a worker process
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+
+import aiohttp
+from django.conf import settings
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SessionManager():
+    """
+    Owns an event loop running in a daemon thread and a single aiohttp session with
+    a keep-alive connection pool. Coroutines from synchronous code are run on this
+    loop so connections, DNS lookups and TLS handshakes are reused across requests.
+    The loop is recreated if the process forks (e.g. uWSGI workers).
+    """
+
+    def __init__(self):
+        """Load object"""
+        self.pid = None
+        self.loop = None
+        self.thread = None
+        self.session = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start event loop thread if not running in this process."""
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.session = None
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(
+                target=self.loop.run_forever, name='geocontext-session', daemon=True)
+            self.thread.start()
+
+    def run(self, coroutine):
+        """Run coroutine on shared event loop and wait for the result.
+
+        :param coroutine: Coroutine to run
+        :type coroutine: coroutine
+        :return: Result of the coroutine
+        """
+        self.start()
+        if threading.current_thread() is self.thread:
+            raise RuntimeError('Can not wait on the shared session loop from itself')
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        return future.result()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return shared session - created on first use from inside the loop.
+
+        :return: shared http session
+        :rtype: aiohttp.ClientSession
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.UPSTREAM_HTTP_LIMIT,
+                limit_per_host=settings.UPSTREAM_HTTP_LIMIT_PER_HOST,
+                keepalive_timeout=settings.UPSTREAM_HTTP_KEEPALIVE,
+                ttl_dns_cache=settings.UPSTREAM_HTTP_DNS_TTL,
+                use_dns_cache=True
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=settings.UPSTREAM_HTTP_TIMEOUT,
+                connect=settings.UPSTREAM_HTTP_CONNECT_TIMEOUT
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    def close(self):
+        """Close session and stop event loop."""
+        if self.pid != os.getpid() or self.loop is None or not self.loop.is_running():
+            return
+        if self.session is not None:
+            try:
+                self.run(self.session.close())
+            except Exception as e:
+                LOGGER.warning(f'Could not close shared session: {e}')
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+session_manager = SessionManager()
+atexit.register(session_manager.close)
+
+
+def run_in_session(coroutine_function, *args, **kwargs):
+    """Run coroutine function with the shared session as first argument.
+
+    :param coroutine_function: async function accepting session as first argument
+    :type coroutine_function: function
+    :return: Result of the coroutine
+    """
+    async def wrapper():
+        session = await session_manager.get_session()
+        return await coroutine_function(session, *args, **kwargs)
+
+    return session_manager.run(wrapper())
@@ -0,0 +1,127 @@
+"""
+Module with single-flight coordination of concurrent cache misses
+"""
+from contextlib import contextmanager
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db import connection
+
+from geocontext.utilities.geometry import snap_point
+
+LOGGER = logging.getLogger(__name__)
+
+_local_locks = {}
+_local_locks_lock = threading.Lock()
+
+
+def flight_key(service_id: int, point: Point, tolerance: float) -> int:
+    """Return lock key for a service request around a point snapped to the tolerance
+    grid - concurrent queries in the same cell share one upstream request.
+
+    :param service_id: Service id
+    :type service_id: int
+    :param point: Query point
+    :type point: Point
+    :param tolerance: Query tolerance in meters
+    :type tolerance: float
+    :return: Signed 64 bit key (PostgreSQL advisory lock key)
+    :rtype: int
+    """
+    column, row = snap_point(point, tolerance)
+    digest = hashlib.blake2b(
+        f'{service_id}:{tolerance}:{column}:{row}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def acquire_local(key: int, deadline: float) -> threading.Lock:
+    """Acquire in-process lock for key - None if the deadline passed."""
+    with _local_locks_lock:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    if entry[0].acquire(timeout=max(deadline - time.monotonic(), 0)):
+        return entry[0]
+    release_local(key, None)
+    return None
+
+
+def release_local(key: int, lock: threading.Lock):
+    """Release in-process lock for key and drop it when no thread waits for it."""
+    with _local_locks_lock:
+        entry = _local_locks[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _local_locks[key]
+    if lock is not None:
+        lock.release()
+
+
+def acquire_advisory(keys: list, deadline: float) -> bool:
+    """Poll PostgreSQL session advisory locks for all keys until deadline. All keys
+    are tried in one statement - locks of a partial attempt are released before
+    polling again so waiting requests never hold locks another request needs.
+    """
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                'SELECT key FROM unnest(%s::bigint[]) AS key '
+                'WHERE pg_try_advisory_lock(key)', [keys])
+            locked = [row[0] for row in cursor.fetchall()]
+            if len(locked) == len(keys):
+                return True
+            release_advisory(locked)
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+
+
+def release_advisory(keys: list):
+    """Release PostgreSQL session advisory locks for keys in one statement."""
+    if len(keys) == 0:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_unlock(key) FROM unnest(%s::bigint[]) AS key', [keys])
+
+
+@contextmanager
+def single_flight(keys: list):
+    """Hold in-process and PostgreSQL advisory locks for keys so only one request
+    across threads and worker processes fetches a given service/cell at a time.
+    Followers block until the leader is done and should then re-check the cache.
+    If SINGLE_FLIGHT_TIMEOUT passes the caller continues without the locks.
+
+    :param keys: Lock keys from flight_key
+    :type keys: list
+    :return: Whether all locks were acquired
+    :rtype: bool
+    """
+    if not settings.SINGLE_FLIGHT_ENABLED or len(keys) == 0:
+        yield False
+        return
+
+    # Fixed order avoids deadlocks between requests sharing several keys
+    keys = sorted(set(keys))
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_TIMEOUT
+    local_locks = []
+    advisory_locks = []
+    try:
+        for key in keys:
+            lock = acquire_local(key, deadline)
+            if lock is None:
+                break
+            local_locks.append((key, lock))
+        if len(local_locks) == len(keys) and acquire_advisory(keys, deadline):
+            advisory_locks = keys
+        acquired = len(advisory_locks) == len(keys)
+        if not acquired:
+            LOGGER.warning('Single flight lock timeout - fetching without lock')
+        yield acquired
+    finally:
+        release_advisory(advisory_locks)
+        for key, lock in local_locks:
+            release_local(key, lock)
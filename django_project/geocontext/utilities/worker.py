@@ -1,35 +1,243 @@
 """
 Module containing controlling Worker class and methods for gathering results
 """
-from datetime import datetime as dt
-from json import loads
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from functools import partial
+import hashlib
+from datetime import datetime as dt, timedelta
+from json import dumps, loads
 from pytz import UTC
 import logging
+import os
+import threading
 
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import MultiPoint, Point
 from django.contrib.gis.db.models.functions import Distance
+from django.db import connection, connections, transaction
 from django.db.models.query import QuerySet
+from django.conf import settings
 from calendar import month_name
+from rest_framework.renderers import JSONRenderer
 from django.db.models import Q
 
 from geocontext.models.cache import Cache
 from geocontext.models.collection import Collection
+from geocontext.models.collection_groups import CollectionGroups
 from geocontext.models.group import Group
-from geocontext.models.log import Log
-from geocontext.models.service import Service
 from geocontext.models.group_services import GroupServices
+from geocontext.models.response_cache import ResponseCache
+from geocontext.models.service import Service
 from geocontext.serializers.cache import CacheSerializer
-from geocontext.serializers.collection import NestedCollectionSerializer
-from geocontext.serializers.group import NestedGroupSerializer
-from geocontext.utilities.geometry import transform, flatten
-from geocontext.utilities.async_service import async_retrieve_services, AsyncService
+from geocontext.utilities.geometry import (
+    cell_key, containment_geometry, snap_point, transform, flatten
+)
+from geocontext.utilities.async_service import (
+    async_retrieve_services, get_tolerance, AsyncService
+)
+from geocontext.utilities.lru import LRUCache
+from geocontext.utilities.query_log import log_query
+from geocontext.utilities.registry import get_registry
+from geocontext.utilities.single_flight import flight_key, single_flight
 
-from django.db.models import Value, CharField, Case, When
+from django.db.models import Value, BooleanField, CharField, Case, When
 from django.db.models.functions import StrIndex, Reverse, Right, Replace
 from django.contrib.postgres.fields import ArrayField
 
 logger = logging.getLogger(__name__)
 MONTHS = list(map(lambda x: x.lower(), list(month_name)[1:]))
+REGISTRIES = ['service', 'group', 'collection']
+
+# Per process cell key -> Cache lookup in front of the cell key index
+CELL_CACHE = LRUCache(max_entries=settings.CACHE_CELL_KEYS_LOCAL_ENTRIES)
+
+
+def store_cell_cache(cache: Cache):
+    """Keep cache in the process cell cache until it expires.
+
+    :param cache: Cache with cell key
+    :type cache: Cache
+    """
+    ttl = (cache.expired_time - dt.utcnow().replace(tzinfo=UTC)).total_seconds()
+    if cache.cell_key and ttl > 0:
+        CELL_CACHE.set(cache.cell_key, cache, ttl=ttl)
+
+
+# Per process nested query results in front of the Cache table
+RESULT_CACHE = LRUCache(
+    max_entries=settings.RESULT_CACHE_LOCAL_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_LOCAL_BYTES
+)
+
+
+# Background refresh of stale caches - flight keys of refreshes in progress
+_refresh_executor = None
+_refresh_executor_pid = None
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+
+def get_refresh_executor() -> ThreadPoolExecutor:
+    """Return thread pool for stale cache refreshes, recreated after a fork.
+
+    :return: Thread pool executor
+    :rtype: ThreadPoolExecutor
+    """
+    global _refresh_executor, _refresh_executor_pid
+    with _refresh_lock:
+        if _refresh_executor is None or _refresh_executor_pid != os.getpid():
+            _refresh_executor = ThreadPoolExecutor(
+                max_workers=settings.STALE_REFRESH_WORKERS,
+                thread_name_prefix='geocontext-refresh')
+            _refresh_executor_pid = os.getpid()
+            _refreshing.clear()
+        return _refresh_executor
+
+
+def response_keys(instance) -> set:
+    """Return registries and keys of queries that include a registry object: the
+    object itself and the groups and collections containing it.
+
+    :param instance: Service, Group, Collection, GroupServices or CollectionGroups
+    :type instance: Model
+    :return: Set of (registry, key) tuples
+    :rtype: set
+    """
+    keys = set()
+    group_ids = []
+    collection_ids = []
+    if isinstance(instance, Service):
+        keys.add(('service', instance.key))
+        group_ids = list(GroupServices.objects.filter(
+            service_id=instance.pk).values_list('group_id', flat=True))
+    elif isinstance(instance, Group):
+        group_ids = [instance.pk]
+    elif isinstance(instance, GroupServices):
+        group_ids = [instance.group_id]
+    elif isinstance(instance, Collection):
+        collection_ids = [instance.pk]
+    elif isinstance(instance, CollectionGroups):
+        collection_ids = [instance.collection_id]
+
+    if len(group_ids) > 0:
+        keys.update(
+            ('group', key) for key in
+            Group.objects.filter(id__in=group_ids).values_list('key', flat=True))
+        collection_ids = list(CollectionGroups.objects.filter(
+            group_id__in=group_ids).values_list('collection_id', flat=True))
+    if len(collection_ids) > 0:
+        keys.update(
+            ('collection', key) for key in
+            Collection.objects.filter(id__in=collection_ids).values_list(
+                'key', flat=True))
+    # Deleted groups and collections are no longer in their tables
+    if isinstance(instance, Group):
+        keys.add(('group', instance.key))
+    elif isinstance(instance, Collection):
+        keys.add(('collection', instance.key))
+    return keys
+
+
+def delete_responses(keys: set):
+    """Delete stored responses of registries and keys.
+
+    :param keys: Set of (registry, key) tuples
+    :type keys: set
+    """
+    query = Q()
+    for registry, key in keys:
+        query |= Q(registry=registry, key=key)
+    if len(keys) > 0:
+        ResponseCache.objects.filter(query).delete()
+
+
+def clear_results(instance=None, update_fields=None, **kwargs):
+    """Drop process result cache and stored responses of queries including the
+    changed registry object. Results of other processes are keyed by the shared
+    registry version, bumped on commit. Used as a receiver for model signals.
+
+    :param instance: Changed registry object
+    :type instance: Model
+    :param update_fields: Fields saved (None for all fields)
+    :type update_fields: frozenset
+    """
+    # Service availability checks only update the status
+    if update_fields is not None and set(update_fields) <= {'status'}:
+        return
+    RESULT_CACHE.clear()
+    # Results stored by concurrent queries before the commit are dropped too
+    transaction.on_commit(RESULT_CACHE.clear)
+    transaction.on_commit(partial(delete_responses, response_keys(instance)))
+
+
+def geometry_hash(geometry) -> str:
+    """Hash of the cache geometry - unique per service in the Cache table.
+
+    :param geometry: Cache geometry
+    :type geometry: GEOSGeometry
+    :return: md5 hex digest of the EWKB geometry
+    :rtype: str
+    """
+    if geometry is None:
+        return None
+    return hashlib.md5(bytes(geometry.ewkb)).hexdigest()
+
+
+def upsert_caches(caches: list):
+    """Insert caches in one statement - a cache with the same service and geometry
+    as an existing row updates that row instead, unless it has no value: a failed
+    request does not overwrite a stored value. An updated row keeps its cell key,
+    as cell lookups of the point that created it would miss otherwise. Primary keys
+    are set on caches that were inserted or updated.
+
+    :param caches: Unsaved caches
+    :type caches: list
+    """
+    # A row can only be updated once per statement - the last cache wins
+    unique = {}
+    for cache in caches:
+        unique[(cache.service_id, cache.geometry_hash)] = cache
+    if len(unique) == 0:
+        return
+    rows = list(unique.values())
+    query = f"""
+        INSERT INTO {Cache._meta.db_table} (
+            name, source_uri, geometry, service_id, value, created_time,
+            expired_time, cell_key, geometry_hash)
+        SELECT
+            v.name, v.source_uri, ST_GeomFromEWKB(v.geometry), v.service_id, v.value,
+            v.created_time, v.expired_time, v.cell_key, v.geometry_hash
+        FROM unnest(
+            %s::varchar[], %s::varchar[], %s::bytea[], %s::integer[], %s::varchar[],
+            %s::timestamptz[], %s::timestamptz[], %s::varchar[], %s::varchar[]
+        ) AS v(name, source_uri, geometry, service_id, value, created_time,
+               expired_time, cell_key, geometry_hash)
+        ON CONFLICT (service_id, geometry_hash) DO UPDATE SET
+            name = EXCLUDED.name,
+            source_uri = EXCLUDED.source_uri,
+            value = EXCLUDED.value,
+            created_time = EXCLUDED.created_time,
+            expired_time = EXCLUDED.expired_time,
+            cell_key = COALESCE({Cache._meta.db_table}.cell_key, EXCLUDED.cell_key)
+        WHERE EXCLUDED.value IS NOT NULL
+        RETURNING id, service_id, geometry_hash
+    """
+    params = [
+        [cache.name for cache in rows],
+        [cache.source_uri for cache in rows],
+        [bytes(cache.geometry.ewkb) if cache.geometry else None for cache in rows],
+        [cache.service_id for cache in rows],
+        [cache.value for cache in rows],
+        [cache.created_time for cache in rows],
+        [cache.expired_time for cache in rows],
+        [cache.cell_key for cache in rows],
+        [cache.geometry_hash for cache in rows],
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        ids = {(row[1], row[2]): row[0] for row in cursor.fetchall()}
+    for cache in caches:
+        cache.pk = ids.get((cache.service_id, cache.geometry_hash))
 
 
 class Worker():
@@ -38,7 +246,7 @@ class Worker():
     """
 
     def __init__(self, registry: str, key: str, point: Point,
-                 tolerance: float, outformat: str):
+                 tolerance: float, outformat: str, log: bool = True):
         """Init method for worker class.
 
         :param key: Service, Group or Collection key.
@@ -49,13 +257,16 @@ class Worker():
         :type tolerance: float
         :param outformat: Output format
         :type outformat: str
+        :param log: Log the query (default True)
+        :type log: bool
         """
         self.registry = registry
         self.key = key
         self.point = point
         self.tolerance = tolerance
         self.outformat = outformat
-        self.log_request()
+        if log:
+            self.log_request()
 
     def retrieve_all(self) -> dict:
         """Retrieve all service values matching query from cache - or request externally.
@@ -63,57 +274,185 @@ class Worker():
         :return: Serialized cache in out_format
         :rtype: dict
         """
+        if self.outformat not in ['json', 'geojson']:
+            raise ValueError(f'Output format "{self.outformat}" not supported')
+
+        result_key = self.result_key()
+        serial = RESULT_CACHE.get(result_key) if result_key is not None else None
+        if serial is None:
+            caches = self.retrieve_all_caches()
+            serial = self.nest_caches(caches)
+            if result_key is not None:
+                self.store_result(result_key, serial, caches)
+        else:
+            serial = deepcopy(serial)
+
+        if self.outformat == 'json':
+            return serial
+        return self.to_geojson(serial)
+
+    def retrieve_body(self) -> bytes:
+        """Retrieve rendered JSON body of retrieve_all. The nested result is stored
+        rendered per registry key and tolerance grid cell, so later queries in the
+        cell skip cache lookups and serializers.
+
+        :return: Rendered response in out_format
+        :rtype: bytes
+        """
+        if self.outformat not in ['json', 'geojson']:
+            raise ValueError(f'Output format "{self.outformat}" not supported')
+
+        tolerance = self.result_tolerance()
+        response_key = None
+        body = None
+        if tolerance is not None:
+            response_key = cell_key(f'{self.registry}:{self.key}', self.point, tolerance)
+            body = ResponseCache.objects.filter(
+                cell_key=response_key,
+                expired_time__gte=dt.utcnow().replace(tzinfo=UTC)
+            ).order_by('-expired_time').values_list('body', flat=True).first()
+
+        if body is None:
+            caches = self.retrieve_all_caches()
+            body = JSONRenderer().render(self.nest_caches(caches)).decode()
+            ttl = self.result_ttl(caches)
+            if response_key is not None and ttl > 0:
+                now = dt.utcnow().replace(tzinfo=UTC)
+                ResponseCache.objects.create(
+                    registry=self.registry,
+                    key=self.key,
+                    cell_key=response_key,
+                    body=body,
+                    created_time=now,
+                    expired_time=now + timedelta(seconds=ttl)
+                )
+
+        if self.outformat == 'json':
+            return body.encode()
+        geometry = JSONRenderer().render(loads(self.point.json)).decode()
+        return (
+            '{"type":"Feature","properties":' + body + ',"geometry":' + geometry + '}'
+        ).encode()
+
+    def result_tolerance(self) -> float:
+        """Smallest tolerance of the queried services - results are reused within
+        a grid cell at this tolerance.
+
+        :return: Tolerance or None if the key has no services
+        :rtype: float
+        """
+        services = self.get_services()
+        if len(services) == 0:
+            return None
+        return min(get_tolerance(service, self.tolerance) for service in services)
+
+    def result_ttl(self, caches: list) -> float:
+        """Seconds until the first cache of a result expires, at most the smallest
+        service cache duration. Results with stale caches are not kept.
+
+        :param caches: Caches in the result
+        :type caches: list
+        :return: Time to live in seconds
+        :rtype: float
+        """
+        now = dt.utcnow().replace(tzinfo=UTC)
+        ttls = [(cache.expired_time - now).total_seconds() for cache in caches]
+        ttls.extend(
+            service.cache_duration for service in self.get_services()
+            if service.cache_duration)
+        return min(ttls, default=0)
+
+    def result_key(self) -> tuple:
+        """Key of the query in the process result cache: registry, key, registry
+        version and the grid cell of point at the smallest service tolerance.
+
+        :return: Result cache key or None if result caching is disabled
+        :rtype: tuple
+        """
+        if not settings.RESULT_CACHE_LOCAL:
+            return None
+        tolerance = self.result_tolerance()
+        if tolerance is None:
+            return None
+        return (
+            self.registry,
+            self.key,
+            get_registry().version,
+            snap_point(self.point, tolerance),
+            tolerance
+        )
+
+    def store_result(self, result_key: tuple, serial: dict, caches: list):
+        """Keep nested result in the process result cache until the first cache
+        expires, at most the smallest service cache duration.
+
+        :param result_key: Result cache key
+        :type result_key: tuple
+        :param serial: Nested result
+        :type serial: dict
+        :param caches: Caches in the result
+        :type caches: list
+        """
+        ttl = self.result_ttl(caches)
+        if ttl > 0:
+            serial = deepcopy(serial)
+            size = len(dumps(serial, default=str))
+            RESULT_CACHE.set(result_key, serial, ttl=ttl, size=size)
+
+    def retrieve_all_caches(self) -> list:
+        """Retrieve caches of all services from the Cache table - or request
+        values externally and cache them.
+
+        :return: Caches ordered by service order
+        :rtype: list
+        """
         services = self.get_services()
         caches = self.retrieve_caches(services)
-        req_s = services.exclude(key__in=[cache.service.key for cache in caches])
+        self.revalidate(caches)
+        hits = {cache.service_id for cache in caches}
+        req_s = [service for service in services if service.id not in hits]
         req_s = sorted(req_s, key=lambda service: self.get_order(service.id))
 
         if len(req_s) > 0:
-            async_services = [AsyncService(s, self.point, self.tolerance) for s in req_s]
-            logger.info('test', async_services)
-            new_async_services = async_retrieve_services(async_services)
-            caches.extend(self.bulk_create_caches(new_async_services))
-
-        if self.outformat == 'json':
-            return self.nest_caches(caches)
-        elif self.outformat == 'geojson':
-            return self.to_geojson(self.nest_caches(caches))
-        else:
-            raise ValueError(f'Output format "{self.outformat}" not supported')
+            keys = [
+                flight_key(s.id, self.point, get_tolerance(s, self.tolerance))
+                for s in req_s
+            ]
+            with single_flight(keys) as coordinated:
+                if coordinated:
+                    # A concurrent request may have filled the cache while we waited
+                    new_caches = self.retrieve_caches(req_s)
+                    caches.extend(new_caches)
+                    hits = {cache.service_id for cache in new_caches}
+                    req_s = [service for service in req_s if service.id not in hits]
+                if len(req_s) > 0:
+                    async_services = [
+                        AsyncService(s, self.point, self.tolerance) for s in req_s]
+                    new_async_services = async_retrieve_services(async_services)
+                    caches.extend(self.bulk_create_caches(new_async_services))
+            caches = sorted(caches, key=lambda cache: self.get_order(cache.service_id))
+        return caches
 
     def log_request(self):
-        """Log query"""
-        Log.objects.create(
-            registry=self.registry,
-            key=self.key,
-            geometry=self.point,
-            tolerance=self.tolerance,
-            output_format=self.outformat
-        )
+        """Log query - saved directly, batched or sampled depending on QUERY_LOG_MODE"""
+        log_query(self.registry, self.key, self.point, self.tolerance, self.outformat)
 
-    def get_services(self) -> Service:
+    def get_services(self) -> tuple:
         """Return all services associated with a key from service/group/collection registries.
 
-        :return: Queryset with Service objects
-        :rtype: Service
+        :return: Ordered Service objects from the registry snapshot
+        :rtype: tuple
         """
-        if self.registry == 'service':
-            return Service.objects.filter(key=self.key)
-        elif self.registry == 'group':
-            group_service = GroupServices.objects.filter(group__key=self.key).order_by(
-                "order").values("service")
-            services = Service.objects.filter(id__in=group_service)
-            return services
-
-        elif self.registry == 'collection':
-            services = Service.objects.filter(group__collection__key=self.key)
-            return services
-        else:
-            raise ValueError(f'Registry "{self.registry}" not supported')
+        return get_registry().get_services(self.registry, self.key)
 
     def retrieve_caches(self, services: QuerySet) -> list:
         """Retrieve valid caches that are within the tolerance distance of point.
-        Single cache is returned per service that is the closest to the point.
+        Single cache is returned per service that is the closest to the point
+        (DISTINCT ON service ordered by distance). Caches of containment services
+        must contain the point. For services with a stale_while_revalidate window
+        expired caches within the window are returned flagged as stale, if there is
+        no valid cache. With CACHE_CELL_KEYS enabled
+        caches from the same tolerance grid cell are looked up first.
 
         https://stackoverflow.com/questions/20582966/django-order-by-filter-with-distinct
 
@@ -122,37 +461,203 @@ class Worker():
         :return: List of caches
         :rtype: list
         """
-        caches = Cache.objects.filter(
-            geometry__dwithin=(self.point, self.tolerance),
-            service__in=services,
-            expired_time__gte=dt.utcnow().replace(tzinfo=UTC)
-        ).annotate(
-            distance=Distance('geometry', self.point),
-            last_subsrt=Right('service__key', StrIndex(Reverse('service__key'), Value('_')) - 1,
-                              output_field=CharField()),
-        )
-        return sorted(caches, key=lambda cache: self.get_order(cache.service.id))
+        caches = []
+        if settings.CACHE_CELL_KEYS:
+            caches = self.retrieve_cell_caches(services)
+            hits = {cache.service_id for cache in caches}
+            services = [service for service in services if service.id not in hits]
+
+        if len(services) > 0:
+            # Containment services only hit caches whose area holds the point
+            contained = [service for service in services if service.cache_containment]
+            within = Q(geometry__dwithin=(self.point, self.tolerance))
+            now = dt.utcnow().replace(tzinfo=UTC)
+            valid = Q(expired_time__gte=now)
+            windows = {service.stale_while_revalidate for service in services}
+            for window in windows - {None, 0}:
+                valid |= Q(
+                    service__in=[
+                        service for service in services
+                        if service.stale_while_revalidate == window],
+                    expired_time__gte=now - timedelta(seconds=window))
+            caches.extend(Cache.objects.filter(
+                within & ~Q(service__in=contained) |
+                Q(geometry__intersects=self.point, service__in=contained),
+                valid,
+                service__in=services,
+            ).annotate(
+                distance=Distance('geometry', self.point),
+                stale=Case(
+                    When(expired_time__lt=now, then=Value(True)),
+                    default=Value(False),
+                    output_field=BooleanField()),
+                last_subsrt=Right(
+                    'service__key', StrIndex(Reverse('service__key'), Value('_')) - 1,
+                    output_field=CharField()),
+            ).order_by('service_id', 'stale', 'distance').distinct('service_id'))
+        caches = self.attach_services(caches)
+        return sorted(caches, key=lambda cache: self.get_order(cache.service_id))
+
+    def retrieve_cell_caches(self, services: QuerySet) -> list:
+        """Retrieve valid caches stored for the tolerance grid cell of point per
+        service - from the process cell cache or an indexed cell key lookup.
+
+        :param services: Service QuerySet
+        :type services: QuerySet
+        :return: List of caches
+        :rtype: list
+        """
+        now = dt.utcnow().replace(tzinfo=UTC)
+        keys = {
+            cell_key(service.id, self.point, get_tolerance(service, self.tolerance)):
+            service.id for service in services
+        }
+        caches = []
+        for key in list(keys):
+            cache = CELL_CACHE.get(key)
+            if cache is not None and cache.expired_time >= now:
+                caches.append(cache)
+                del keys[key]
+
+        if len(keys) > 0:
+            for cache in Cache.objects.filter(
+                cell_key__in=list(keys), expired_time__gte=now
+            ).order_by('cell_key', '-created_time').distinct('cell_key'):
+                if keys.get(cache.cell_key) == cache.service_id:
+                    store_cell_cache(cache)
+                    caches.append(cache)
+        return caches
+
+    def revalidate(self, caches: list):
+        """Refresh stale caches in the background. A refresh per service and grid
+        cell runs at a time in this process, other processes wait on single flight
+        locks and skip the refresh if a valid cache exists afterwards.
+
+        :param caches: Retrieved caches
+        :type caches: list
+        """
+        services_by_id = get_registry().services_by_id
+        for cache in caches:
+            service = services_by_id.get(cache.service_id)
+            if not getattr(cache, 'stale', False) or service is None:
+                continue
+            key = flight_key(
+                service.id, self.point, get_tolerance(service, self.tolerance))
+            executor = get_refresh_executor()
+            with _refresh_lock:
+                if key in _refreshing:
+                    continue
+                _refreshing.add(key)
+            executor.submit(self.refresh, service, key)
+
+    def refresh(self, service, key: int):
+        """Request service value and cache it - run in a refresh thread. A failed
+        request keeps the stale cache until the stale_while_revalidate window ends.
+
+        :param service: Service to refresh
+        :type service: Service
+        :param key: Flight key of service and point
+        :type key: int
+        """
+        try:
+            with single_flight([key]):
+                caches = self.retrieve_caches([service])
+                if any(not getattr(cache, 'stale', False) for cache in caches):
+                    return
+                new_async_services = [
+                    util for util in async_retrieve_services(
+                        [AsyncService(service, self.point, self.tolerance)])
+                    if util.value is not None and not util.failed
+                ]
+                if len(new_async_services) == 0:
+                    logger.info(f'Refresh of {service.key} failed - keeping stale cache')
+                    return
+                self.bulk_create_caches(new_async_services)
+        except Exception as e:
+            logger.error(f'Could not refresh stale cache of {service.key}: {e}')
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+            connections.close_all()
+
+    def attach_services(self, caches) -> list:
+        """Attach services from the registry snapshot to caches, so serializing a
+        cache does not query its service.
+
+        :param caches: Cache iterable
+        :type caches: iterable
+        :return: list of caches
+        :rtype: list
+        """
+        services_by_id = get_registry().services_by_id
+        caches = list(caches)
+        for cache in caches:
+            if cache.service_id in services_by_id:
+                cache.service = services_by_id[cache.service_id]
+        return caches
 
     def bulk_create_caches(self, new_async_services: list) -> list:
-        """Bulk update cache with new AsyncService values.
+        """Bulk upsert cache with new AsyncService values. Requests without value
+        are cached for CACHE_NEGATIVE_TTL seconds only, or not saved at all if it is
+        0. Failed requests (unreachable service, oversized response) are not saved -
+        the circuit breaker limits their retries.
 
         :param new_async_services: list of service util with values
         :type new_async_services: list
         :return: list of new caches
         :rtype: list
         """
-        cache_list = []
+        now = dt.utcnow().replace(tzinfo=UTC)
+        negative_expire = now + timedelta(seconds=settings.CACHE_NEGATIVE_TTL)
+        caches = []
         for async_services in new_async_services:
-            cache_list.append(Cache(
+            geometry = self.cache_geometry(async_services)
+            expired_time = async_services.expire
+            if async_services.value is None:
+                expired_time = min(expired_time, negative_expire)
+            caches.append(Cache(
                 service=async_services.service,
                 name=async_services.key,
                 value=async_services.value,
-                created_time=dt.utcnow().replace(tzinfo=UTC),
-                expired_time=async_services.expire,
+                created_time=now,
+                expired_time=expired_time,
                 source_uri=async_services.source_uri,
-                geometry=flatten(transform(async_services.geometry, Cache.srid))
+                geometry=geometry,
+                geometry_hash=geometry_hash(geometry),
+                cell_key=cell_key(
+                    async_services.service.id, async_services.point,
+                    async_services.tolerance)
             ))
-        return Cache.objects.bulk_create(cache_list)
+        upsert_caches([
+            cache for cache, async_service in zip(caches, new_async_services)
+            if not async_service.failed and (
+                cache.value is not None or settings.CACHE_NEGATIVE_TTL > 0)
+        ])
+        if settings.CACHE_CELL_KEYS:
+            for cache in caches:
+                if cache.pk is not None:
+                    store_cell_cache(cache)
+        return caches
+
+    def cache_geometry(self, async_service: AsyncService):
+        """Geometry to cache for an AsyncService result: the feature geometry, or
+        for containment services the area in which the value is valid.
+
+        :param async_service: AsyncService with values
+        :type async_service: AsyncService
+        :return: 2D geometry in cache srid
+        :rtype: GEOSGeometry
+        """
+        geometry = flatten(transform(async_service.geometry, Cache.srid))
+        if async_service.service.cache_containment:
+            geometry = containment_geometry(
+                geometry,
+                async_service.point_cache,
+                async_service.tolerance,
+                settings.CACHE_CONTAINMENT_CLIP,
+                settings.CACHE_CONTAINMENT_SIMPLIFY
+            )
+        return geometry
 
     def nest_caches(self, caches: list) -> dict:
         """Prepare serialized cache representation in nested output format.
@@ -163,41 +668,213 @@ class Worker():
         :rtype: dict
         """
         serial = {}
+        registry = get_registry()
         if self.registry == 'service':
             serial = CacheSerializer(caches[0]).data
         elif self.registry == 'group':
-            serial = NestedGroupSerializer(Group.objects.get(key=self.key)).data
+            serial = registry.get_serial('group', self.key)
             serial['services'] = [CacheSerializer(cache).data for cache in caches]
         elif self.registry == 'collection':
-            serial = NestedCollectionSerializer(Collection.objects.get(key=self.key)).data
+            serial = registry.get_serial('collection', self.key)
+            # Bucket serialized caches by service - a service can be in many groups
+            cache_serials = {}
+            for cache in caches:
+                cache_serials.setdefault(cache.service_id, CacheSerializer(cache).data)
             group_serials = []
             for group_key in serial['groups']:
-                group = Group.objects.get(key=group_key)
-                group_serial = NestedGroupSerializer(group).data
-                group_services = group.services.all()
-                caches_filt = [c for c in caches if c.service in group_services]
-                group_serial['services'] = [CacheSerializer(c).data for c in caches_filt]
+                group_serial = registry.get_serial('group', group_key)
+                group_serial['services'] = [
+                    cache_serials[service.id]
+                    for service in registry.groups[group_key].services
+                    if service.id in cache_serials
+                ]
                 group_serials.append(group_serial)
             serial['groups'] = group_serials
         return serial
 
-    def to_geojson(self, serial: dict) -> dict:
+    def to_geojson(self, serial: dict, point: Point = None) -> dict:
         """
         Add json data to geojson properties
         """
+        point = self.point if point is None else point
         return {
             'type': 'Feature',
             'properties': serial,
-            'geometry': loads(self.point.json)
+            'geometry': loads(point.json)
         }
 
-    def get_order(self, service):
+    @property
+    def service_order(self) -> dict:
+        """Order map of service id to position in the registry key.
+        Groups order by group service order, collections by collection group order
+        and then group service order. Built once from the registry snapshot.
 
-        if self.registry == 'group':
-            group_service = GroupServices.objects.get(group__key=self.key, service=service)
-        elif self.registry == 'collection':
-            group_service = GroupServices.objects.get(group__collection__key=self.key, service=service)
-        else:
-            return 0
+        :return: Dict of service id to position
+        :rtype: dict
+        """
+        if getattr(self, '_service_order', None) is None:
+            services = self.get_services() if self.registry in REGISTRIES else ()
+            self._service_order = {
+                service.id: position for position, service in enumerate(services)
+            }
+        return self._service_order
+
+    def get_order(self, service_id: int) -> int:
+        """Return position of service in the registry key (0 if not ordered).
+
+        :param service_id: Service id
+        :type service_id: int
+        :return: Service position
+        :rtype: int
+        """
+        return self.service_order.get(service_id, 0)
+
+
+class BatchWorker(Worker):
+    """
+    Worker class responsible for retrieving data for many points in one pass.
+    Services are resolved once, caches are looked up for all points in a single
+    query and only cache misses are requested externally in one shared session.
+    """
+
+    def __init__(self, registry: str, key: str, points: list,
+                 tolerance: float, outformat: str, log: bool = True):
+        """Init method for batch worker class.
+
+        :param key: Service, Group or Collection key.
+        :type key: str
+        :param points: List of GEOS query points (same srid)
+        :type points: list
+        :param tolerance: Tolerance to search around point (in meteres)
+        :type tolerance: float
+        :param outformat: Output format
+        :type outformat: str
+        :param log: Log the query (default True)
+        :type log: bool
+        """
+        if len(points) == 0:
+            raise ValueError('At least one point is required')
+        if len(points) > settings.BATCH_QUERY_MAX_POINTS:
+            raise ValueError(
+                f'Batch queries are limited to {settings.BATCH_QUERY_MAX_POINTS} points')
+        self.points = points
+        # The batch is logged as a single query with a multipoint geometry
+        super().__init__(
+            registry, key, MultiPoint(points, srid=points[0].srid), tolerance, outformat,
+            log)
+
+    def retrieve_all(self) -> list:
+        """Retrieve service values for all points from cache - or request externally.
+
+        :return: Serialized cache per point in out_format
+        :rtype: list
+        """
+        services = list(self.get_services())
+        order = self.service_order
+        point_caches = self.retrieve_caches(services)
+        self.retrieve_missing(
+            services, point_caches, concurrency=settings.BATCH_QUERY_CONCURRENCY)
+
+        results = []
+        for index, point in enumerate(self.points):
+            caches = sorted(
+                point_caches[index], key=lambda cache: order.get(cache.service_id, 0))
+            if self.outformat == 'json':
+                results.append(self.nest_caches(caches))
+            elif self.outformat == 'geojson':
+                results.append(self.to_geojson(self.nest_caches(caches), point))
+            else:
+                raise ValueError(f'Output format "{self.outformat}" not supported')
+
+        if self.outformat == 'geojson':
+            return {'type': 'FeatureCollection', 'features': results}
+        return results
+
+    def retrieve_missing(self, services: list, point_caches: dict,
+                         concurrency: int = None, host_rate: float = None) -> int:
+        """Request values of services without a cache at a point externally in one
+        shared session and cache them. New caches are added to point_caches.
 
-        return group_service.order
+        :param services: Service list
+        :type services: list
+        :param point_caches: Dict of point index to list of caches
+        :type point_caches: dict
+        :param concurrency: Maximum number of requests in flight (None for no limit)
+        :type concurrency: int
+        :param host_rate: Maximum requests per second per upstream host
+            (None for no limit)
+        :type host_rate: float
+        :return: Number of values requested
+        :rtype: int
+        """
+        pending = []
+        for index, point in enumerate(self.points):
+            hits = {cache.service_id for cache in point_caches[index]}
+            for service in services:
+                if service.id not in hits:
+                    pending.append((index, AsyncService(service, point, self.tolerance)))
+
+        if len(pending) > 0:
+            new_async_services = async_retrieve_services(
+                [async_service for _, async_service in pending],
+                concurrency=concurrency, host_rate=host_rate)
+            new_caches = self.bulk_create_caches(new_async_services)
+            for (index, _), cache in zip(pending, new_caches):
+                point_caches[index].append(cache)
+        return len(pending)
+
+    def retrieve_caches(self, services: list) -> dict:
+        """Retrieve valid caches within the tolerance distance of every point.
+        A single query is used for all points - per point only the cache closest
+        to the point is returned for each service. Caches of containment services
+        must contain the point.
+
+        :param services: Service list
+        :type services: list
+        :return: Dict of point index to list of caches
+        :rtype: dict
+        """
+        point_caches = {index: [] for index in range(len(self.points))}
+        if len(services) == 0:
+            return point_caches
+
+        points = [transform(point, Cache.srid) for point in self.points]
+        # Containment and distance caches are joined separately so that both
+        # spatial predicates can use the geometry index
+        query = f"""
+            WITH p AS (
+                SELECT idx, ST_SetSRID(ST_MakePoint(x, y), %s) AS geom
+                FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS u(x, y, idx)
+            )
+            SELECT DISTINCT ON (m.point_index, m.service_id) m.*
+            FROM (
+                SELECT c.*, p.idx - 1 AS point_index,
+                    ST_Distance(c.geometry, p.geom) AS point_distance
+                FROM p JOIN {Cache._meta.db_table} c
+                    ON ST_Intersects(c.geometry, p.geom)
+                WHERE c.service_id = ANY(%s) AND c.expired_time >= %s
+                UNION ALL
+                SELECT c.*, p.idx - 1 AS point_index,
+                    ST_Distance(c.geometry, p.geom) AS point_distance
+                FROM p JOIN {Cache._meta.db_table} c
+                    ON ST_DWithin(c.geometry, p.geom, %s)
+                WHERE c.service_id = ANY(%s) AND c.expired_time >= %s
+            ) m
+            ORDER BY m.point_index, m.service_id, m.point_distance
+        """
+        now = dt.utcnow().replace(tzinfo=UTC)
+        params = [
+            Cache.srid,
+            [point.x for point in points],
+            [point.y for point in points],
+            [service.id for service in services if service.cache_containment],
+            now,
+            self.tolerance,
+            [service.id for service in services if not service.cache_containment],
+            now
+        ]
+        services_by_id = {service.id: service for service in services}
+        for cache in Cache.objects.raw(query, params):
+            cache.service = services_by_id[cache.service_id]
+            point_caches[cache.point_index].append(cache)
+        return point_caches
@@ -4,30 +4,80 @@ import logging
 LOGGER = logging.getLogger(__name__)
 
 
-def get_bounding_box_srs(service, content):
-    root = ElementTree.fromstring(content)
-    tag = root.tag.split('}')
-    layer_tag = 'Layer'
-    bound_tag = 'BoundingBox'
-    name_tag = 'Name'
-    if len(tag) > 1:
-        layer_tag = tag[0] + '}' + layer_tag
-        bound_tag = tag[0] + '}' + bound_tag
-        name_tag = tag[0] + '}' + name_tag
-
-    layers = root.iter(layer_tag)
-    out = {}
-    layer_name = service.split(':')[1] if len(service.split(':')) > 1 else service
-
-    for layer in layers:
-        if layer.find(name_tag) is None:
-            continue
-        if layer.find(name_tag).text == layer_name or layer.find(name_tag).text == service:
-            out['srs'] = layer.find(bound_tag).get('CRS')
-            out['bbox'] = '{},{},{},{}'.format(
-                layer.find(bound_tag).get('minx'),
-                layer.find(bound_tag).get('miny'),
-                layer.find(bound_tag).get('maxx'),
-                layer.find(bound_tag).get('maxy'),
-            )
-            return out
+def local_name(tag: str) -> str:
+    """Return tag without namespace.
+
+    :param tag: Element tag, e.g. {http://www.opengis.net/wms}Layer
+    :type tag: str
+    :return: Local tag name
+    :rtype: str
+    """
+    return tag.split('}')[-1]
+
+
+def find_layer(layers: dict, typename: str) -> dict:
+    """Find bounding box and srs of a layer by typename with or without workspace.
+
+    :param layers: Dict of layer name to bounding box and srs
+    :type layers: dict
+    :param typename: Layer typename, e.g. workspace:layer
+    :type typename: str
+    :return: Bounding box and srs or None if the layer is not in layers
+    :rtype: dict
+    """
+    parts = typename.split(':')
+    layer_name = parts[1] if len(parts) > 1 else typename
+    return layers.get(layer_name, layers.get(typename))
+
+
+class CapabilitiesParser():
+    """
+    Incremental capabilities document parser. Collects the first bounding box and
+    CRS of every named layer while data is fed, so reading a large document can
+    stop as soon as the requested layer was parsed.
+    """
+
+    def __init__(self, typename: str):
+        """Load object
+
+        :param typename: Requested layer typename
+        :type typename: str
+        """
+        self.typename = typename
+        self.layers = {}
+        self.result = None
+        self.parser = ElementTree.XMLPullParser(events=('end',))
+
+    def feed(self, data: bytes) -> bool:
+        """Parse next part of the document.
+
+        :param data: Document chunk
+        :type data: bytes
+        :return: True if the requested layer was found
+        :rtype: bool
+        """
+        self.parser.feed(data)
+        for _, element in self.parser.read_events():
+            if local_name(element.tag) != 'Layer':
+                continue
+            children = {}
+            for child in element:
+                children.setdefault(local_name(child.tag), child)
+            name = children.get('Name')
+            bound = children.get('BoundingBox')
+            if name is not None and bound is not None:
+                self.layers[name.text] = {
+                    'srs': bound.get('CRS'),
+                    'bbox': '{},{},{},{}'.format(
+                        bound.get('minx'),
+                        bound.get('miny'),
+                        bound.get('maxx'),
+                        bound.get('maxy'),
+                    )
+                }
+            # Nested layers were handled already - only direct children are kept
+            for child in element:
+                if local_name(child.tag) == 'Layer':
+                    child.clear()
+        self.result = find_layer(self.layers, self.typename)
+        return self.result is not None
@@ -2,6 +2,7 @@
 
 from distutils.util import strtobool
 import psycopg2
+from psycopg2.pool import PoolError
 
 from django.conf import settings
 from django.http import Http404, HttpResponse
@@ -12,7 +13,8 @@ from rest_framework.response import Response
 from geocontext.forms import GeoContextForm
 from geocontext.models.service import Service
 from geocontext.serializers.service import ServiceSerializer
-from geocontext.utilities.geometry import parse_coord
+from geocontext.utilities.geometry import parse_coord, parse_points
+from geocontext.utilities.river import find_river_names
 from geocontext.utilities.worker import Worker
 
 
@@ -84,33 +86,47 @@ class RiverNameAPIView(views.APIView):
     """Retrieve river name matching: x (long), y (lat).
     """
     def get(self, request, x, y):
-        db_name = settings.RIVER_DATABASE['NAME']
-        db_host = settings.RIVER_DATABASE['HOST']
-        db_user = settings.RIVER_DATABASE['USER']
-        db_pass = settings.RIVER_DATABASE['PASSWORD']
-        db_port = 5432
-        if not db_name or not db_host:
+        if not settings.RIVER_DATABASE['NAME'] or not settings.RIVER_DATABASE['HOST']:
             raise Http404()
+        point = parse_coord(x, y, 4326)
         try:
-            conn = (
-                psycopg2.connect(
-                    f"dbname={db_name} user={db_user} host={db_host}"
-                    f" password='{db_pass}' port={db_port}"
-                )
-            )
+            results = find_river_names([point])
+        except PoolError:
+            return Response(
+                'River database busy', status.HTTP_503_SERVICE_UNAVAILABLE)
         except psycopg2.OperationalError:
             raise Http404()
-        cursor = conn.cursor()
-        point = parse_coord(x, y, 4326)
-        cursor.callproc('finder', [point.x, point.y])
-        results = cursor.fetchone()
-        cursor.close()
-        if results:
+        if results[0]:
             return Response(results[0])
         else:
             raise Http404()
 
 
+class RiverNameBatchAPIView(views.APIView):
+    """Retrieve river names for many points in one request.
+    Points are posted as a list of [x (long), y (lat)] pairs.
+    """
+    def post(self, request):
+        if not settings.RIVER_DATABASE['NAME'] or not settings.RIVER_DATABASE['HOST']:
+            raise Http404()
+        try:
+            points = parse_points(request.data.get('points', None), 4326)
+            max_points = settings.BATCH_QUERY_MAX_POINTS
+            if len(points) > max_points:
+                raise ValueError(f'Batch queries are limited to {max_points} points')
+        except (AttributeError, ValueError) as e:
+            return Response(str(e), status.HTTP_400_BAD_REQUEST)
+        try:
+            results = find_river_names(points)
+        except PoolError:
+            return Response(
+                'River database busy', status.HTTP_503_SERVICE_UNAVAILABLE)
+        except psycopg2.OperationalError:
+            return Response(
+                'River database unavailable', status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(results)
+
+
 def get_service(request):
     """Get get_service view.
 
@@ -1,4 +1,8 @@
+from django.conf import settings
+from django.http import HttpResponse
 from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -7,9 +11,63 @@ from geocontext.serializers.collection import CollectionSerializer
 from geocontext.serializers.group import GroupSerializer
 from geocontext.serializers.service import ServiceSerializer
 from geocontext.throttling import UserTierRateThrottle
-from geocontext.utilities.worker import Worker
-from geocontext.utilities.geometry import parse_coord
-from geocontext.authentication import CustomTokenAuthentication
+from geocontext.utilities.async_service import geometry_pool_stats
+from geocontext.utilities.worker import (
+    BatchWorker, CELL_CACHE, RESULT_CACHE, Worker
+)
+from geocontext.utilities.geometry import parse_coord, parse_points
+from geocontext.authentication import CustomTokenAuthentication, TOKEN_CACHE
+
+
+def parse_query(params: dict) -> tuple:
+    """Validate registry, key, tolerance and output format of a query.
+
+    :param params: Query arguments
+    :type params: dict
+    :raises KeyError: If the key is missing
+    :raises ValueError: If an argument is not valid
+    :return: Registry, key, tolerance and output format
+    :rtype: tuple
+    """
+    key = params.get('key', None)
+    if key is None:
+        raise KeyError('Required request argument (registry, key) missing.')
+
+    try:
+        tolerance = float(params.get('tolerance', 10.0))
+    except ValueError:
+        raise ValueError('Tolerance should be a float')
+
+    registry = params.get('registry', '')
+    if registry.lower() not in ['collection', 'service', 'group']:
+        raise ValueError('Registry should be "collection", '
+                         '"service" or "group".')
+
+    outformat = params.get('outformat', 'geojson').lower()
+    if outformat not in ['geojson', 'json']:
+        raise ValueError('Output format should be either '
+                         'json or geojson')
+    return registry, key, tolerance, outformat
+
+
+def batch_params(request) -> tuple:
+    """Return query arguments and points of a batch query. Arguments can be
+    passed in the query string or the json body, a GeoJSON FeatureCollection
+    body only holds the points.
+
+    :param request: Batch query request
+    :type request: Request
+    :raises KeyError: If the body is not a json object
+    :return: Query arguments and points (None if missing)
+    :rtype: tuple
+    """
+    params = request.query_params.dict()
+    if not isinstance(request.data, dict):
+        raise KeyError('Request body should be a json object.')
+    if request.data.get('type') == 'FeatureCollection':
+        return params, request.data
+    params.update(request.data)
+    return params, params.get('points', None)
 
 
 class GenericAPIView(APIView):
@@ -21,33 +79,20 @@ class GenericAPIView(APIView):
 
     def get(self, request):
         try:
-            key = request.GET.get('key', None)
             x = request.GET.get('x', None)
             y = request.GET.get('y', None)
-            if None in [key, x, y]:
+            if None in [request.GET.get('key', None), x, y]:
                 raise KeyError('Required request argument ('
                                'registry, key, x, y) missing.')
-
+            registry, key, tolerance, outformat = parse_query(request.GET)
             srid = request.GET.get('srid', 4326)
 
-            try:
-                tolerance = float(request.GET.get('tolerance', 10.0))
-            except ValueError:
-                raise ValueError('Tolerance should be a float')
-
-            registry = request.GET.get('registry', '')
-            if registry.lower() not in ['collection', 'service', 'group']:
-                raise ValueError('Registry should be "collection", '
-                                 '"service" or "group".')
-
-            outformat = request.GET.get('outformat', 'geojson').lower()
-            if outformat not in ['geojson', 'json']:
-                raise ValueError('Output format should be either '
-                                 'json or geojson')
-
             point = parse_coord(x, y, srid)
-            data = Worker(
-                registry, key, point, tolerance, outformat).retrieve_all()
+            worker = Worker(registry, key, point, tolerance, outformat)
+            if settings.RESPONSE_CACHE:
+                return HttpResponse(
+                    worker.retrieve_body(), content_type='application/json')
+            data = worker.retrieve_all()
             return Response(data, status=status.HTTP_200_OK)
         except KeyError as e:
             return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
@@ -56,6 +101,53 @@ class GenericAPIView(APIView):
                 str(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class BatchAPIView(APIView):
+    """Geocontext API v2 endpoint for querying many points in one request.
+    Points are posted as a list of coordinates or a GeoJSON FeatureCollection,
+    with one result returned per point in the same order. Each point counts as
+    a request against the user tier rate limit.
+    """
+    throttle_classes = [UserTierRateThrottle]
+    authentication_classes = [CustomTokenAuthentication]
+
+    def get_throttle_cost(self, request) -> int:
+        """Return number of posted points - charged by UserTierRateThrottle.
+
+        :param request: Batch query request
+        :type request: Request
+        :return: Number of requests the query counts for
+        :rtype: int
+        """
+        try:
+            _, points = batch_params(request)
+        except (KeyError, ParseError):
+            return 1
+        if isinstance(points, dict):
+            points = points.get('features')
+        if not isinstance(points, list):
+            return 1
+        return max(len(points), 1)
+
+    def post(self, request):
+        try:
+            params, points = batch_params(request)
+            if None in [params.get('key', None), points]:
+                raise KeyError('Required request argument ('
+                               'registry, key, points) missing.')
+            registry, key, tolerance, outformat = parse_query(params)
+            srid = params.get('srid', 4326)
+            points = parse_points(points, srid)
+            worker = BatchWorker(registry, key, points, tolerance, outformat)
+        except (KeyError, ValueError) as e:
+            return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+        try:
+            data = worker.retrieve_all()
+            return Response(data, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                str(e), status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class RegistryAPIView(APIView):
     """
     Fetch list of group or collection
@@ -81,3 +173,18 @@ class RegistryAPIView(APIView):
         else:
             collections = Collection.objects.all()
             return Response(CollectionSerializer(collections, many=True).data)
+
+
+class StatsAPIView(APIView):
+    """
+    In-process cache and geometry pool counters of the serving worker process
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'result_cache': RESULT_CACHE.stats(),
+            'cell_cache': CELL_CACHE.stats(),
+            'token_cache': TOKEN_CACHE.stats(),
+            'geometry_pool': geometry_pool_stats(),
+        })